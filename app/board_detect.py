@@ -1,12 +1,88 @@
 import cv2
 import numpy as np
 import logging
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger("boggle")
 
+# Shared morphology kernel for dilate/erode passes
+_KERNEL_3X3 = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+
+# Board localization runs on a copy downscaled to at most this many pixels on the long side
+DETECT_MAX_DIM = 1024
+
+# Warp sizes are rounded to a multiple of this so 4x4, 5x5 and 6x6 grids all split evenly
+WARP_SIZE_MULTIPLE = 60
+
+
+# Remap tables for recently used board geometries, keyed by (corners bytes, warp_size)
+_WARP_MAP_CACHE_SIZE = 8
+_warp_map_cache: OrderedDict[tuple[bytes, int], tuple[np.ndarray, np.ndarray]] = OrderedDict()
+_warp_map_lock = threading.Lock()  # detection may run on several executor threads
+
+
+def _build_warp_maps(M: np.ndarray, dstsize: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """Build (mapx, mapy) remap tables equivalent to ``cv2.warpPerspective(img, M, dstsize)``.
+
+    initUndistortRectifyMap with identity camera matrices and M as the
+    rectification transform yields exactly the per-pixel source coordinates
+    warpPerspective would compute; ``cv2.remap(img, mapx, mapy, cv2.INTER_LINEAR)``
+    then applies the warp to any image sharing that geometry.
+    """
+    eye = np.eye(3)
+    return cv2.initUndistortRectifyMap(eye, None, M, eye, dstsize, cv2.CV_16SC2)
+
+
+def _get_warp_maps(corners: np.ndarray, M: np.ndarray, warp_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return cached _build_warp_maps tables for the homography M.
+
+    Repeated frames with the same board geometry only pay for the cv2.remap.
+    """
+    key = (corners.tobytes(), warp_size)
+    with _warp_map_lock:
+        maps = _warp_map_cache.get(key)
+        if maps is not None:
+            _warp_map_cache.move_to_end(key)
+            return maps
+
+    maps = _build_warp_maps(M, (warp_size, warp_size))
+    with _warp_map_lock:
+        _warp_map_cache[key] = maps
+        if len(_warp_map_cache) > _WARP_MAP_CACHE_SIZE:
+            _warp_map_cache.popitem(last=False)
+    return maps
+
+
+# Requested warp sizes already warned about, so a misconfigured WARP_SIZE logs once, not per frame
+_warned_warp_sizes: set[int] = set()
+
+
+def _round_warp_size(warp_size: int) -> int:
+    """Round warp_size to the nearest multiple of WARP_SIZE_MULTIPLE (at least one).
+
+    Logs a warning the first time a given size has to be changed.
+    """
+    rounded = max(WARP_SIZE_MULTIPLE, round(warp_size / WARP_SIZE_MULTIPLE) * WARP_SIZE_MULTIPLE)
+    if rounded != warp_size and warp_size not in _warned_warp_sizes:
+        _warned_warp_sizes.add(warp_size)
+        logger.warning(
+            "Warp size %d is not a multiple of %d; using %d so every grid size splits evenly",
+            warp_size, WARP_SIZE_MULTIPLE, rounded,
+        )
+    return rounded
+
 
 def _order_corners(pts: np.ndarray) -> np.ndarray:
     """Order 4 points as: top-left, top-right, bottom-right, bottom-left."""
+    # Convex hull gives the points in traversal order; counter-clockwise in
+    # OpenCV's y-up convention is clockwise on screen. Rotate so the smallest
+    # x+y (top-left) comes first.
+    hull = cv2.convexHull(pts.astype(np.float32), clockwise=False).reshape(-1, 2)
+    if len(hull) == 4:
+        return np.roll(hull, -int(np.argmin(hull.sum(axis=1))), axis=0)
+
+    # Non-convex quad: fall back to sum/diff extremes
     rect = np.zeros((4, 2), dtype=np.float32)
     s = pts.sum(axis=1)
     d = np.diff(pts, axis=1).ravel()
@@ -17,35 +93,34 @@ def _order_corners(pts: np.ndarray) -> np.ndarray:
     return rect
 
 
-def _find_board_contour(image_bgr: np.ndarray):
-    """Find the largest roughly-square contour in the image."""
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-    # Try adaptive threshold first
-    thresh = cv2.adaptiveThreshold(
-        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV, 11, 2
-    )
-
-    # Also try Canny
-    edges = cv2.Canny(blurred, 50, 150)
+def _find_board_contour(gray: np.ndarray, *, blurred: np.ndarray, thresh_dilated: np.ndarray):
+    """Find the largest roughly-square contour in the image.
 
+    ``blurred`` and ``thresh_dilated`` are the shared preprocessing from
+    detect_board_and_warp (Gaussian blur, and its dilated adaptive threshold).
+    Contours are scanned largest-first, so each source stops at its first
+    valid quad; the Canny source is skipped entirely when the threshold
+    source already found a confident board (large and close to square).
+    """
     best_contour = None
     best_area = 0
-    img_area = image_bgr.shape[0] * image_bgr.shape[1]
+    best_aspect = 0.0
+    img_area = gray.shape[0] * gray.shape[1]
 
-    for source in [thresh, edges]:
-        # Dilate to close gaps
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        dilated = cv2.dilate(source, kernel, iterations=2)
+    def _edges_dilated():
+        # Also try Canny
+        edges = cv2.Canny(blurred, 50, 150)
+        return cv2.dilate(edges, _KERNEL_3X3, iterations=2)
 
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Adaptive threshold first, then Canny — both dilated to close gaps
+    for get_source in (lambda: thresh_dilated, _edges_dilated):
+        contours, _ = cv2.findContours(get_source(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = sorted(contours, key=cv2.contourArea, reverse=True)
 
         for cnt in contours:
             area = cv2.contourArea(cnt)
-            if area < img_area * 0.05:  # too small
-                continue
+            if area < img_area * 0.05 or area <= best_area:  # too small, or can't beat current best
+                break
 
             peri = cv2.arcLength(cnt, True)
             approx = cv2.approxPolyDP(cnt, 0.02 * peri, True)
@@ -58,42 +133,43 @@ def _find_board_contour(image_bgr: np.ndarray):
                 if h == 0:
                     continue
                 aspect = w / h
-                if 0.6 < aspect < 1.6 and area > best_area:
+                if 0.6 < aspect < 1.6:
                     best_area = area
+                    best_aspect = aspect
                     best_contour = ordered
+                    break
+
+        # Good enough: a board filling most of the frame at near-1:1 aspect
+        if best_area > img_area * 0.5 and 0.9 < best_aspect < 1.1:
+            return best_contour
 
     return best_contour
 
 
-def _find_board_hough(image_bgr: np.ndarray):
+def _find_board_hough(gray: np.ndarray):
     """Fallback: use Hough lines to find the board rectangle."""
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
     edges = cv2.Canny(gray, 50, 150)
 
     lines = cv2.HoughLinesP(edges, 1, np.pi / 180, 100, minLineLength=100, maxLineGap=10)
     if lines is None:
         return None
 
-    h_lines = []
-    v_lines = []
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
-        angle = np.abs(np.arctan2(y2 - y1, x2 - x1))
-        if angle < 0.3:  # roughly horizontal
-            h_lines.append((y1 + y2) / 2)
-        elif angle > 1.27:  # roughly vertical
-            v_lines.append((x1 + x2) / 2)
-
-    if len(h_lines) < 2 or len(v_lines) < 2:
+    lines = lines.reshape(-1, 4).astype(np.float32)
+    x1, y1, x2, y2 = lines.T
+    angle = np.abs(np.arctan2(y2 - y1, x2 - x1))
+    h_mask = angle < 0.3  # roughly horizontal
+    v_mask = angle > 1.27  # roughly vertical
+
+    if np.count_nonzero(h_mask) < 2 or np.count_nonzero(v_mask) < 2:
         return None
 
-    h_lines.sort()
-    v_lines.sort()
+    h_mids = (y1[h_mask] + y2[h_mask]) * 0.5
+    v_mids = (x1[v_mask] + x2[v_mask]) * 0.5
 
-    top = h_lines[0]
-    bottom = h_lines[-1]
-    left = v_lines[0]
-    right = v_lines[-1]
+    top = h_mids.min()
+    bottom = h_mids.max()
+    left = v_mids.min()
+    right = v_mids.max()
 
     corners = np.array([
         [left, top],
@@ -105,21 +181,13 @@ def _find_board_hough(image_bgr: np.ndarray):
     return corners
 
 
-def _find_board_from_cells(image_bgr: np.ndarray):
+def _find_board_from_cells(gray: np.ndarray, *, thresh_dilated: np.ndarray):
     """Fallback: find individual cell contours and compute their collective bounding box."""
-    gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     img_h, img_w = gray.shape
     img_area = img_h * img_w
 
     # Find cell-like contours (each cell is ~1-4% of image area)
-    thresh = cv2.adaptiveThreshold(
-        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY_INV, 11, 2
-    )
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    dilated = cv2.dilate(thresh, kernel, iterations=2)
-    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours, _ = cv2.findContours(thresh_dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     # Filter for square-ish contours in the cell size range (1-5% of image)
     cell_rects = []
@@ -161,23 +229,54 @@ def _find_board_from_cells(image_bgr: np.ndarray):
 
 
 def detect_board_and_warp(image_bgr: np.ndarray, warp_size: int = 600):
-    """Detect the Boggle board and return a perspective-warped square grayscale image."""
+    """Detect the Boggle board and return a perspective-warped square grayscale image.
+
+    Accepts a BGR or an already single-channel image.
+    """
     debug_info = {}
+    warp_size = _round_warp_size(warp_size)
+
+    # Everything downstream is grayscale: convert once, then detect on and warp
+    # the single-channel image (1/3 the bytes, fastest 8UC1 kernel path)
+    if image_bgr.ndim == 2:
+        gray = image_bgr
+    else:
+        gray = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+
+    # Localize on a downscaled copy; corners only need pixel-ish accuracy and the
+    # blur/threshold/Canny passes scale with pixel count. The warp itself still
+    # samples the full-resolution image.
+    h, w = gray.shape
+    scale = min(1.0, DETECT_MAX_DIM / max(h, w))
+    if scale < 1.0:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        small = gray
+
+    # Blur + adaptive threshold + dilate are shared by the contour and cell-grouping detectors
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    thresh = cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV, 11, 2
+    )
+    thresh_dilated = cv2.dilate(thresh, _KERNEL_3X3, iterations=2)
 
-    corners = _find_board_contour(image_bgr)
+    corners = _find_board_contour(small, blurred=blurred, thresh_dilated=thresh_dilated)
     debug_info["method"] = "contour"
 
     if corners is None:
-        corners = _find_board_from_cells(image_bgr)
+        corners = _find_board_from_cells(small, thresh_dilated=thresh_dilated)
         debug_info["method"] = "cell_grouping"
 
     if corners is None:
-        corners = _find_board_hough(image_bgr)
+        corners = _find_board_hough(small)
         debug_info["method"] = "hough"
 
+    if corners is not None and scale < 1.0:
+        corners = (corners / scale).astype(np.float32)
+
     if corners is None:
         # Last resort: use center crop assuming board is roughly centered
-        h, w = image_bgr.shape[:2]
         margin_x = int(w * 0.1)
         margin_y = int(h * 0.2)
         corners = np.array([
@@ -199,8 +298,8 @@ def detect_board_and_warp(image_bgr: np.ndarray, warp_size: int = 600):
     ], dtype=np.float32)
 
     M = cv2.getPerspectiveTransform(corners, dst)
-    warped = cv2.warpPerspective(image_bgr, M, (warp_size, warp_size))
-    warped_gray = cv2.cvtColor(warped, cv2.COLOR_BGR2GRAY)
+    mapx, mapy = _get_warp_maps(corners, M, warp_size)
+    warped_gray = cv2.remap(gray, mapx, mapy, cv2.INTER_LINEAR)
 
     return warped_gray, debug_info
 
@@ -216,8 +315,7 @@ def infer_grid_size(board_gray: np.ndarray) -> int:
     cell_mask = cv2.bitwise_not(thresh)
 
     # Erode to separate cells that might be touching at rounded corners
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    cell_mask = cv2.erode(cell_mask, kernel, iterations=2)
+    cell_mask = cv2.erode(cell_mask, _KERNEL_3X3, iterations=2)
 
     contours, _ = cv2.findContours(cell_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
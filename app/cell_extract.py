@@ -1,59 +1,75 @@
+import threading
+
 import cv2
 import numpy as np
 
+# One CLAHE instance per thread — building one per cell is wasted work, but
+# CLAHE.apply keeps internal buffers so an instance can't be shared across threads
+_clahe_local = threading.local()
+
+
+def _get_clahe() -> cv2.CLAHE:
+    clahe = getattr(_clahe_local, "clahe", None)
+    if clahe is None:
+        clahe = _clahe_local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4))
+    return clahe
+
 
 def split_cells(board_gray: np.ndarray, grid_size: int, inset: float = 0.15) -> list[np.ndarray]:
-    """Split a warped square board image into individual cell images."""
+    """Split a warped square board image into individual cell images.
+
+    The board is reshaped into an (N, N, cell_h, cell_w) tensor, so the inset
+    crop is vectorized rather than sliced cell by cell; flattening the swapped,
+    cropped axes to N*N cells makes a single copy. Any remainder rows/cols
+    when the size isn't a multiple of grid_size are dropped from the bottom/right.
+    """
     h, w = board_gray.shape
-    cell_h = h / grid_size
-    cell_w = w / grid_size
+    cell_h = h // grid_size
+    cell_w = w // grid_size
     inset_y = int(cell_h * inset)
     inset_x = int(cell_w * inset)
 
-    cells = []
-    for r in range(grid_size):
-        for c in range(grid_size):
-            y1 = int(r * cell_h) + inset_y
-            y2 = int((r + 1) * cell_h) - inset_y
-            x1 = int(c * cell_w) + inset_x
-            x2 = int((c + 1) * cell_w) - inset_x
-            cell = board_gray[y1:y2, x1:x2]
-            cells.append(cell)
+    grid = board_gray[:grid_size * cell_h, :grid_size * cell_w]
+    grid = grid.reshape(grid_size, cell_h, grid_size, cell_w).swapaxes(1, 2)
+    grid = grid[..., inset_y:cell_h - inset_y, inset_x:cell_w - inset_x]
+
+    return list(grid.reshape(grid_size * grid_size, *grid.shape[2:]))
 
-    return cells
 
+def preprocess_cell(cell_gray: np.ndarray, target_size: int = 64, out: np.ndarray | None = None) -> np.ndarray:
+    """Preprocess a cell image for OCR: resize, CLAHE, binarize.
 
-def preprocess_cell(cell_gray: np.ndarray, target_size: int = 64) -> np.ndarray:
-    """Preprocess a cell image for OCR: resize, CLAHE, binarize."""
-    # Resize
-    resized = cv2.resize(cell_gray, (target_size, target_size), interpolation=cv2.INTER_LINEAR)
+    If ``out`` is given (a ``(target_size, target_size)`` uint8 array) every
+    step writes into it and it is returned, so callers can reuse one buffer.
+    """
+    # Resize — INTER_AREA when shrinking (faster box filter, no aliasing), linear when enlarging
+    h, w = cell_gray.shape[:2]
+    interp = cv2.INTER_AREA if h > target_size or w > target_size else cv2.INTER_LINEAR
+    resized = cv2.resize(cell_gray, (target_size, target_size), dst=out, interpolation=interp)
 
     # CLAHE contrast enhancement
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4))
-    enhanced = clahe.apply(resized)
+    enhanced = _get_clahe().apply(resized, dst=out)
 
     # Otsu binarization
-    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
 
     # Ensure letter is dark on light background (most common)
     # If more than half the pixels are dark, invert
     if np.mean(binary) < 128:
-        binary = cv2.bitwise_not(binary)
+        binary = cv2.bitwise_not(binary, dst=out)
 
     return binary
 
 
 def make_cell_montage(cells: list[np.ndarray], grid_size: int, cell_display_size: int = 80) -> np.ndarray:
     """Create a montage image of all cells for debugging."""
-    rows = []
-    for r in range(grid_size):
-        row_cells = []
-        for c in range(grid_size):
-            idx = r * grid_size + c
-            cell = cells[idx]
-            resized = cv2.resize(cell, (cell_display_size, cell_display_size))
-            # Add border
-            bordered = cv2.copyMakeBorder(resized, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=128)
-            row_cells.append(bordered)
-        rows.append(np.hstack(row_cells))
-    return np.vstack(rows)
+    # Preallocate the whole montage; the gray fill doubles as the 1px cell borders
+    tile = cell_display_size + 2
+    montage = np.full((tile * grid_size, tile * grid_size), 128, dtype=np.uint8)
+    for idx in range(grid_size * grid_size):
+        r, c = divmod(idx, grid_size)
+        y = r * tile + 1
+        x = c * tile + 1
+        cv2.resize(cells[idx], (cell_display_size, cell_display_size),
+                   dst=montage[y:y + cell_display_size, x:x + cell_display_size])
+    return montage
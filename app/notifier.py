@@ -5,6 +5,24 @@ import httpx
 
 logger = logging.getLogger("boggle")
 
+# Shared client so repeated notifications reuse the pooled HTTP/2 connection to ntfy
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=10.0, http2=True)
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def send_notification(
     words: list[str],
@@ -39,18 +57,17 @@ async def send_notification(
         counts = " | ".join(f"{l}L:{len(g)}" for l, g in sorted(by_length.items()) if l >= min_len)
         body = ",".join(selected) + "\n\n" + counts
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                f"{ntfy_url}/{topic}",
-                content=body.encode("utf-8"),
-                headers={
-                    "Title": title,
-                    "Priority": "high",
-                    "Tags": "game_die",
-                },
-            )
-            resp.raise_for_status()
-            logger.info("Notification sent to %s/%s (status %d)", ntfy_url, topic, resp.status_code)
+        resp = await _get_client().post(
+            f"{ntfy_url}/{topic}",
+            content=body.encode("utf-8"),
+            headers={
+                "Title": title,
+                "Priority": "high",
+                "Tags": "game_die",
+            },
+        )
+        resp.raise_for_status()
+        logger.info("Notification sent to %s/%s (status %d)", ntfy_url, topic, resp.status_code)
 
     except Exception as e:
         logger.error("Failed to send notification: %s", e)
@@ -1,4 +1,5 @@
 import logging
+import threading
 from pathlib import Path
 
 import cv2
@@ -20,7 +21,32 @@ CONFUSION_MAP = {
 }
 
 
-def load_templates(templates_dir: str) -> dict[str, np.ndarray] | None:
+class TemplateSet(dict):
+    """Letter -> template mapping with NCC statistics precomputed for batched scoring.
+
+    Behaves like a plain dict. ``letters`` keeps insertion order, ``zero_mean``
+    is the (K, H, W) float32 stack of mean-subtracted templates and ``norms``
+    holds their L2 norms, so scoring a cell against every letter is a single
+    einsum instead of one ``cv2.matchTemplate`` call per letter.
+    """
+
+    def __init__(self, templates: dict[str, np.ndarray]):
+        super().__init__(templates)
+        self.letters = list(self.keys())
+        if self.letters:
+            stack = np.stack([tpl.astype(np.float32) for tpl in self.values()])
+            stack -= stack.mean(axis=(1, 2), keepdims=True)
+        else:
+            stack = np.empty((0, 64, 64), dtype=np.float32)
+        self.zero_mean = stack
+        self.norms = np.sqrt((stack ** 2).sum(axis=(1, 2)))
+
+
+def _as_template_set(templates: dict[str, np.ndarray]) -> TemplateSet:
+    return templates if isinstance(templates, TemplateSet) else TemplateSet(templates)
+
+
+def load_templates(templates_dir: str) -> TemplateSet | None:
     """Load letter template images from a directory. Returns None if no templates found."""
     tpl_dir = Path(templates_dir)
     if not tpl_dir.exists():
@@ -38,10 +64,10 @@ def load_templates(templates_dir: str) -> dict[str, np.ndarray] | None:
                     tpl = cv2.bitwise_not(tpl)
                 templates[letter] = tpl
 
-    return templates if templates else None
+    return TemplateSet(templates) if templates else None
 
 
-def _generate_synthetic_templates(size: int = 64) -> dict[str, np.ndarray]:
+def _generate_synthetic_templates(size: int = 64) -> TemplateSet:
     """Generate synthetic letter templates using OpenCV's built-in font.
 
     These are a rough fallback for cells that EasyOCR's text detector misses
@@ -50,7 +76,7 @@ def _generate_synthetic_templates(size: int = 64) -> dict[str, np.ndarray]:
     """
     templates = {}
     for letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
-        img = np.ones((size, size), dtype=np.uint8) * 255
+        img = np.full((size, size), 255, dtype=np.uint8)
         font_scale = 1.5
         thickness = 2
         text_size = cv2.getTextSize(letter, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0]
@@ -58,7 +84,7 @@ def _generate_synthetic_templates(size: int = 64) -> dict[str, np.ndarray]:
         y = (size + text_size[1]) // 2
         cv2.putText(img, letter, (x, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thickness)
         templates[letter] = img
-    return templates
+    return TemplateSet(templates)
 
 
 def _count_holes(binary_img: np.ndarray) -> int:
@@ -67,7 +93,7 @@ def _count_holes(binary_img: np.ndarray) -> int:
     contours, hierarchy = cv2.findContours(inv, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
     if hierarchy is None:
         return 0
-    return sum(1 for i in range(len(hierarchy[0])) if hierarchy[0][i][3] != -1)
+    return int(np.count_nonzero(hierarchy[0, :, 3] != -1))
 
 
 # Expected hole counts per letter (from game font templates)
@@ -79,19 +105,45 @@ TEMPLATE_HOLES = {
 }
 
 
+def _template_scores(cell_processed: np.ndarray, templates: TemplateSet) -> np.ndarray:
+    """Score cells against every template at once (TM_CCOEFF_NORMED, same-size inputs).
+
+    Accepts a single (H, W) cell or an (N, H, W) stack; returns scores of shape
+    (K,) or (N, K) in ``templates.letters`` order. A whole board is one GEMM.
+    """
+    c = cell_processed.astype(np.float32)
+    c -= c.mean(axis=(-2, -1), keepdims=True)
+    num = np.tensordot(c, templates.zero_mean, axes=([-2, -1], [1, 2]))
+    cell_norms = np.sqrt((c ** 2).sum(axis=(-2, -1)))
+    return num / (cell_norms[..., None] * templates.norms + 1e-9)
+
+
 def _template_match(cell_processed: np.ndarray, templates: dict[str, np.ndarray]) -> tuple[str, float]:
     """Match a preprocessed cell against all templates using normalized cross-correlation."""
-    best_letter = "?"
-    best_score = -1.0
+    tpl_set = _as_template_set(templates)
+    if not tpl_set.letters:
+        return "?", -1.0
+
+    scores = _template_scores(cell_processed, tpl_set)
+    best = int(np.argmax(scores))
+    return tpl_set.letters[best], float(scores[best])
+
+
+# Dark-pixel ratio cutoffs for structural disambiguation
+CG_CENTER_RIGHT_RATIO = 0.10
+RP_LOWER_RIGHT_RATIO = 0.08
+
+# Letters whose template match is always re-checked structurally
+_CONFUSABLE_LETTERS = frozenset("RPCG")
 
-    for letter, tpl in templates.items():
-        result = cv2.matchTemplate(cell_processed, tpl, cv2.TM_CCOEFF_NORMED)
-        score = result.max()
-        if score > best_score:
-            best_score = score
-            best_letter = letter
 
-    return best_letter, float(best_score)
+def _count_dark(binary_img: np.ndarray) -> int:
+    """Count letter (zero) pixels in a 0/255 image from preprocess_cell.
+
+    Equivalent to ``np.sum(img < 128)`` for binarized input, but a single
+    SIMD countNonZero pass with no boolean temporary.
+    """
+    return binary_img.size - cv2.countNonZero(binary_img)
 
 
 def _disambiguate_cg(cell_processed: np.ndarray) -> str:
@@ -102,10 +154,10 @@ def _disambiguate_cg(cell_processed: np.ndarray) -> str:
     """
     h, w = cell_processed.shape
     center_right = cell_processed[int(h * 0.4):int(h * 0.6), int(w * 0.45):int(w * 0.8)]
-    total_dark = max(np.sum(cell_processed < 128), 1)
-    cr_dark = np.sum(center_right < 128)
+    total_dark = max(_count_dark(cell_processed), 1)
+    cr_dark = _count_dark(center_right)
     ratio = cr_dark / total_dark
-    return "G" if ratio > 0.10 else "C"
+    return "G" if ratio > CG_CENTER_RIGHT_RATIO else "C"
 
 
 def _disambiguate_rp(cell_processed: np.ndarray) -> str:
@@ -116,26 +168,40 @@ def _disambiguate_rp(cell_processed: np.ndarray) -> str:
     """
     h, w = cell_processed.shape
     lower_right = cell_processed[h // 2:, w // 2:]
-    total_dark = max(np.sum(cell_processed < 128), 1)
-    lr_dark = np.sum(lower_right < 128)
+    total_dark = max(_count_dark(cell_processed), 1)
+    lr_dark = _count_dark(lower_right)
     ratio = lr_dark / total_dark
-    return "R" if ratio > 0.08 else "P"
+    return "R" if ratio > RP_LOWER_RIGHT_RATIO else "P"
 
 
-def _template_match_verified(cell_processed: np.ndarray, templates: dict[str, np.ndarray]) -> tuple[str, float]:
+def _template_match_verified(
+    cell_processed: np.ndarray,
+    templates: dict[str, np.ndarray],
+    raw_scores: np.ndarray | None = None,
+    strong_match: float | None = None,
+) -> tuple[str, float]:
     """Template match with structural verification.
 
     Applies hole-count verification and R/P structural disambiguation.
+    ``raw_scores`` may pass this cell's row of a batched _template_scores call
+    to skip re-scoring. A best score at or above ``strong_match`` is accepted
+    without the hole count, unless the letter is one of the confusable pairs.
     """
-    # Get all scores sorted
-    scores = []
-    for letter, tpl in templates.items():
-        result = cv2.matchTemplate(cell_processed, tpl, cv2.TM_CCOEFF_NORMED)
-        scores.append((letter, result.max()))
-    scores.sort(key=lambda x: -x[1])
-
-    if not scores:
+    tpl_set = _as_template_set(templates)
+    if not tpl_set.letters:
         return "?", 0.0
+    raw = raw_scores if raw_scores is not None else _template_scores(cell_processed, tpl_set)
+
+    # A near-exact match can't have another letter's topology; skip the contour pass
+    if strong_match is not None:
+        best = int(np.argmax(raw))
+        letter = tpl_set.letters[best]
+        if raw[best] >= strong_match and letter not in _CONFUSABLE_LETTERS:
+            return letter, float(raw[best])
+
+    # Get all scores sorted
+    order = np.argsort(-raw, kind="stable")
+    scores = [(tpl_set.letters[k], float(raw[k])) for k in order]
 
     cell_holes = _count_holes(cell_processed)
 
@@ -161,41 +227,94 @@ def _template_match_verified(cell_processed: np.ndarray, templates: dict[str, np
     return scores[0][0], float(scores[0][1])
 
 
-def init_easyocr():
-    """Initialize EasyOCR reader for English."""
+# Process-wide EasyOCR reader — model loading costs far more than inference
+_easyocr_reader = None
+
+
+def init_easyocr(num_threads: int | None = None):
+    """Initialize the EasyOCR reader for English, reusing it if already loaded.
+
+    ``num_threads`` pins torch's CPU thread pool so it doesn't oversubscribe
+    the cores OpenCV and the server also use.
+    """
+    global _easyocr_reader
+    if _easyocr_reader is not None:
+        return _easyocr_reader
+
     try:
         import easyocr
-        reader = easyocr.Reader(["en"], gpu=False, verbose=False)
-        logger.info("EasyOCR reader initialized (CPU)")
-        return reader
+        import torch
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        _easyocr_reader = easyocr.Reader(["en"], gpu=False, verbose=False)
+        logger.info("EasyOCR reader initialized (CPU, %d torch threads)", torch.get_num_threads())
+        return _easyocr_reader
     except Exception as e:
         logger.error("Failed to init EasyOCR: %s", e)
         return None
 
 
+# Per-thread scratch buffer for the inverted board handed to EasyOCR
+_ocr_scratch = threading.local()
+
+# EasyOCR inference stays serialized: torch already spreads one call over
+# TORCH_NUM_THREADS cores, so concurrent requests queue here instead
+_easyocr_lock = threading.Lock()
+
+
+def _inverted_board(warped_gray: np.ndarray) -> np.ndarray:
+    """Invert the board into a reused buffer instead of allocating a copy per request."""
+    buf = getattr(_ocr_scratch, "inverted", None)
+    if buf is None or buf.shape != warped_gray.shape:
+        buf = np.empty_like(warped_gray)
+        _ocr_scratch.inverted = buf
+    return cv2.bitwise_not(warped_gray, dst=buf)
+
+
 def _easyocr_full_board(
     warped_gray: np.ndarray,
     grid_size: int,
     reader,
+    skip_detector: bool = False,
 ) -> dict[tuple[int, int], tuple[str, float]]:
     """Run EasyOCR on the full warped board image.
 
     Much more accurate than per-cell EasyOCR because the text detector
     works better with spatial context from multiple characters.
+    With ``skip_detector`` the CRAFT pass is skipped: the known grid cells are
+    handed to the recognizer directly as boxes, in one batch.
     Returns {(row, col): (letter, confidence)}.
     """
     # Invert: game has white letters on dark cells -> dark letters on white bg
-    inverted = cv2.bitwise_not(warped_gray)
-
-    results = reader.readtext(
-        inverted,
-        allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ",
-        detail=1,
-        paragraph=False,
-        min_size=5,
-        text_threshold=0.3,
-        low_text=0.2,
-    )
+    inverted = _inverted_board(warped_gray)
+
+    with _easyocr_lock:
+        if skip_detector:
+            step = warped_gray.shape[0] // grid_size
+            boxes = [
+                [c * step, (c + 1) * step, r * step, (r + 1) * step]
+                for r in range(grid_size) for c in range(grid_size)
+            ]
+            results = reader.recognize(
+                inverted,
+                horizontal_list=boxes,
+                free_list=[],
+                allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                detail=1,
+                paragraph=False,
+                batch_size=len(boxes),
+            )
+        else:
+            results = reader.readtext(
+                inverted,
+                allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+                detail=1,
+                paragraph=False,
+                min_size=5,
+                text_threshold=0.3,
+                low_text=0.2,
+            )
 
     cell_size = warped_gray.shape[0] / grid_size
     detections: dict[tuple[int, int], tuple[str, float]] = {}
@@ -247,6 +366,8 @@ def recognize_cells(
     confidence_threshold: float = 0.75,
     warped_gray: np.ndarray | None = None,
     grid_size: int | None = None,
+    skip_detector: bool = False,
+    strong_match_threshold: float | None = None,
 ) -> tuple[list[list[str]], list[list[float]]]:
     """Recognize letters using hybrid approach:
 
@@ -255,15 +376,24 @@ def recognize_cells(
 
     If templates/ has game-specific templates (from calibration), uses those.
     Otherwise falls back to synthetic OpenCV-font templates.
+    ``skip_detector`` runs EasyOCR's recognizer on the known cell boxes
+    without the CRAFT text detector (see _easyocr_full_board).
+    ``strong_match_threshold`` lets template matches scoring at least that
+    much skip the hole-count check (see _template_match_verified).
     """
     n = grid_size if grid_size else int(len(cells) ** 0.5)
     letters = ["?"] * len(cells)
     confidences = [0.0] * len(cells)
 
+    # Preprocess once; template matching, smart merge and disambiguation all reuse it
+    processed = np.empty((len(cells), 64, 64), dtype=np.uint8)
+    for i, c in enumerate(cells):
+        preprocess_cell(c, out=processed[i])
+
     # Step 1: Full-board EasyOCR (primary — gets ~80-90% of cells)
     easyocr_detections = {}
     if easyocr_reader is not None and warped_gray is not None:
-        easyocr_detections = _easyocr_full_board(warped_gray, n, easyocr_reader)
+        easyocr_detections = _easyocr_full_board(warped_gray, n, easyocr_reader, skip_detector)
         for (r, c), (letter, conf) in easyocr_detections.items():
             idx = r * n + c
             letters[idx] = letter
@@ -272,13 +402,18 @@ def recognize_cells(
         logger.info("Full-board EasyOCR: %d/%d cells detected", detected, n * n)
 
     # Step 2: Template matching for undetected cells
-    tpl = templates if templates else _generate_synthetic_templates()
+    tpl = _as_template_set(templates) if templates else _generate_synthetic_templates()
     undetected = [i for i in range(len(cells)) if letters[i] == "?"]
-    if undetected:
-        processed = {i: preprocess_cell(cells[i]) for i in undetected}
 
+    # Score every cell against every template in one batched pass; Step 2 and
+    # the smart merge in Step 3 both read from it
+    template_scores = None
+    if undetected or (templates and easyocr_detections):
+        template_scores = _template_scores(processed, tpl)
+
+    if undetected:
         for i in undetected:
-            letter, conf = _template_match_verified(processed[i], tpl)
+            letter, conf = _template_match_verified(processed[i], tpl, template_scores[i], strong_match_threshold)
             letters[i] = letter
             confidences[i] = conf
             r, c = divmod(i, n)
@@ -291,8 +426,9 @@ def recognize_cells(
     if templates:
         for (r, c), (ocr_letter, ocr_conf) in easyocr_detections.items():
             idx = r * n + c
-            cell_processed = preprocess_cell(cells[idx])
-            tpl_letter, tpl_conf = _template_match_verified(cell_processed, tpl)
+            tpl_letter, tpl_conf = _template_match_verified(
+                processed[idx], tpl, template_scores[idx], strong_match_threshold
+            )
             if tpl_letter != ocr_letter and ocr_conf < 0.9:
                 # Template disagrees and EasyOCR isn't highly confident — override when:
                 # a) template is very confident (>0.85), or
@@ -308,11 +444,11 @@ def recognize_cells(
                 # Same letter — boost confidence to the higher of the two
                 confidences[idx] = max(confidences[idx], tpl_conf)
 
-    # Structural disambiguation — apply to all confusable pairs
+    # Structural disambiguation — apply to all confusable pairs, with the same
+    # checks _template_match_verified uses so both paths agree on a cell
     for i in range(len(cells)):
         if letters[i] in ("R", "P"):
-            proc = preprocess_cell(cells[i])
-            correct = _disambiguate_rp(proc)
+            correct = _disambiguate_rp(processed[i])
             if correct != letters[i]:
                 r, c = divmod(i, n)
                 logger.info(
@@ -321,8 +457,7 @@ def recognize_cells(
                 )
                 letters[i] = correct
         elif letters[i] in ("C", "G"):
-            proc = preprocess_cell(cells[i])
-            correct = _disambiguate_cg(proc)
+            correct = _disambiguate_cg(processed[i])
             if correct != letters[i]:
                 r, c = divmod(i, n)
                 logger.info(
@@ -1,48 +1,84 @@
+import asyncio
+import copy
+import json
 import logging
-
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from io import BytesIO
+
+import cv2
+import numpy as np
 from fastapi import FastAPI, File, Request, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, HTMLResponse
-
-from app.settings import settings
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+
+from app.board_detect import detect_board_and_warp, infer_grid_size
+from app.cell_extract import split_cells, make_cell_montage
+from app.metrics import StageTimer
+from app.notifier import close_client, send_notification
+from app.recognition import TemplateSet, load_templates, init_easyocr, recognize_cells
+from app.settings import Settings, settings, update_settings, get_editable_settings, EDITABLE_FIELDS
+from app.solver import Trie, load_trie, solve as solve_board
+
+try:
+    import simplejpeg
+except ImportError:  # cv2.imdecode handles JPEG too, just slower
+    simplejpeg = None
+
+try:
+    import orjson
+except ImportError:  # stdlib json via the plain JSONResponse
+    orjson = None
+
+if orjson is not None:
+    class ORJSONResponse(JSONResponse):
+        """JSONResponse rendered with orjson (also accepts numpy scalars/arrays)."""
+
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    ORJSONResponse = JSONResponse
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 logger = logging.getLogger("boggle")
 
-# These will be populated at startup
-_trie = None
-_templates = None
+# These will be populated at startup (_trie is also swapped by /api/settings).
+# Not Final for that reason; handlers copy them into locals once per request.
+_trie: Trie | None = None
+_templates: TemplateSet | None = None
 _easyocr_reader = None
 
 
 def create_app() -> FastAPI:
-    from contextlib import asynccontextmanager
+    # OpenCV releases the GIL in its C++ kernels, so running the CPU-heavy
+    # pipeline here parallelizes across cores and keeps the event loop free
+    cv_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="cv")
 
     @asynccontextmanager
     async def lifespan(application: FastAPI):
         global _trie, _templates, _easyocr_reader
 
-        import torch
-        torch.set_num_threads(settings.TORCH_NUM_THREADS)
-
-        from app.solver import load_trie
         dict_path = settings.DICTIONARY_COMMON_PATH if settings.COMMON_WORDS_ONLY else settings.DICTIONARY_PATH
         logger.info("Loading dictionary from %s (common_only=%s)", dict_path, settings.COMMON_WORDS_ONLY)
         _trie = load_trie(str(dict_path), settings.MIN_WORD_LENGTH)
         logger.info("Trie loaded")
 
-        from app.recognition import load_templates, init_easyocr
         _templates = load_templates(str(settings.TEMPLATES_DIR))
         if _templates:
             logger.info("Loaded %d letter templates", len(_templates))
         else:
             logger.warning("No letter templates found — Tier A disabled")
 
-        _easyocr_reader = init_easyocr()
+        _easyocr_reader = init_easyocr(settings.TORCH_NUM_THREADS)
         logger.info("EasyOCR reader initialized")
 
         yield
 
-    application = FastAPI(title="Boggle Solver", lifespan=lifespan)
+        await close_client()
+        cv_executor.shutdown(wait=False)
+
+    application = FastAPI(title="Boggle Solver", lifespan=lifespan, default_response_class=ORJSONResponse)
 
     @application.get("/health")
     async def health():
@@ -54,81 +90,67 @@ def create_app() -> FastAPI:
         background_tasks: BackgroundTasks,
         file: UploadFile = File(None),
     ):
-        import cv2
-        import numpy as np
-        from app.metrics import StageTimer
-        from app.board_detect import detect_board_and_warp, infer_grid_size
-        from app.cell_extract import split_cells
-        from app.recognition import recognize_cells
-        from app.solver import solve as solve_board
-        from app.notifier import send_notification
-
         content_type = request.headers.get("content-type", "")
         logger.info("POST /solve content-type=%s", content_type)
 
+        # Snapshot settings once; the pipeline and the notifier get this copy, so a
+        # concurrent /api/settings update can't mix old and new values in one request
+        cfg = copy.copy(settings)
+        max_upload = cfg.MAX_UPLOAD_BYTES
+        # Likewise pin the trie, so a rebuild mid-request doesn't swap dictionaries
+        trie, templates, reader = _trie, _templates, _easyocr_reader
+
         data = None
+        raw_format = None
         if file is not None and file.filename:
             # Standard multipart form upload
             logger.info("Received file: name=%s, type=%s", file.filename, file.content_type)
             if file.content_type and not file.content_type.startswith("image/"):
                 raise HTTPException(400, f"Only image files accepted, got: {file.content_type}")
-            data = await file.read()
+            data = await _read_upload_capped(file, max_upload)
         else:
             # Fallback: read raw body (iOS Shortcut may send image directly)
-            data = await request.body()
+            data = await _read_capped(request, max_upload)
             logger.info("No 'file' field — reading raw body (%d bytes)", len(data))
+            raw_format = _raw_pixel_format(content_type)
 
         if not data:
             raise HTTPException(400, "Empty request body — no image data received")
 
         timer = StageTimer()
+        loop = asyncio.get_running_loop()
 
-        with timer.stage("decode"):
-            logger.info("Received %d bytes", len(data))
-            if len(data) > settings.MAX_UPLOAD_BYTES:
-                raise HTTPException(413, f"File too large (max {settings.MAX_UPLOAD_BYTES} bytes)")
-            arr = np.frombuffer(data, dtype=np.uint8)
-            image = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-            if image is None:
-                raise HTTPException(400, "Could not decode image")
-
-        with timer.stage("board_detect"):
-            warped, debug_info = detect_board_and_warp(image, settings.WARP_SIZE)
-
-        with timer.stage("grid_infer"):
-            grid_size = infer_grid_size(warped)
-
-        with timer.stage("cell_split"):
-            cells = split_cells(warped, grid_size, settings.CELL_INSET)
-
-        with timer.stage("recognize"):
-            board, confidences = recognize_cells(
-                cells, _templates, _easyocr_reader,
-                settings.OCR_CONFIDENCE_THRESHOLD,
-                warped_gray=warped,
-                grid_size=grid_size,
-            )
+        image, warped, debug_info, grid_size, cells, board, confidences = await loop.run_in_executor(
+            cv_executor, _run_cv_pipeline, data, timer, cfg, raw_format, templates, reader,
+        )
 
         # Log detected board for debugging
         board_str = " / ".join(" ".join(row) for row in board)
         logger.info("Board %dx%d: %s", grid_size, grid_size, board_str)
 
         with timer.stage("solve"):
-            all_words, word_positions = solve_board(board, grid_size, _trie, 0)
+            all_words, word_positions = await loop.run_in_executor(
+                cv_executor, solve_board, board, grid_size, trie, 0,
+            )
 
-        words = all_words[:settings.MAX_RESULTS]
+        words = all_words[:cfg.MAX_RESULTS]
         logger.info("Found %d words (returning top %d)", len(all_words), len(words))
 
         # Send notification in background (with ALL words so 4-5 letter filter works)
         background_tasks.add_task(
             send_notification, all_words, grid_size, board,
-            timer.summary(), settings.NTFY_TOPIC, settings.NTFY_URL,
-            settings.NOTIFY_WORDS_PER_GROUP, word_positions
+            timer.summary(), cfg.NTFY_TOPIC, cfg.NTFY_URL,
+            cfg.NOTIFY_WORDS_PER_GROUP, word_positions
         )
 
-        _save_debug_artifacts(image, warped, cells, board, confidences, all_words, timer, grid_size, debug_info)
+        if cfg.DEBUG:
+            # Runs after the response is sent; everything passed is already a plain copy
+            background_tasks.add_task(
+                _save_debug_artifacts, image, warped, cells, board, confidences,
+                all_words, timer, grid_size, debug_info,
+            )
 
-        return JSONResponse({
+        return ORJSONResponse({
             "grid_size": grid_size,
             "board": board,
             "words": words,
@@ -140,38 +162,20 @@ def create_app() -> FastAPI:
 
     @application.post("/debug/cells")
     async def debug_cells(file: UploadFile = File(...)):
-        import cv2
-        import numpy as np
-        from io import BytesIO
-        from fastapi.responses import StreamingResponse
-        from app.board_detect import detect_board_and_warp, infer_grid_size
-        from app.cell_extract import split_cells, make_cell_montage
-
-        data = await file.read()
-        arr = np.frombuffer(data, dtype=np.uint8)
-        image = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-        if image is None:
-            raise HTTPException(400, "Could not decode image")
-
-        warped, _ = detect_board_and_warp(image, settings.WARP_SIZE)
-        grid_size = infer_grid_size(warped)
-        cells = split_cells(warped, grid_size, settings.CELL_INSET)
-        montage = make_cell_montage(cells, grid_size)
-
-        _, buf = cv2.imencode(".png", montage)
-        return StreamingResponse(BytesIO(buf.tobytes()), media_type="image/png")
+        data = await _read_upload_capped(file, settings.MAX_UPLOAD_BYTES)
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(cv_executor, _render_cell_montage, data)
+        return StreamingResponse(BytesIO(png), media_type="image/png")
 
     @application.get("/api/settings")
     async def api_get_settings():
-        from app.settings import get_editable_settings, EDITABLE_FIELDS
         values = get_editable_settings(settings)
         field_types = {k: v.__name__ for k, v in EDITABLE_FIELDS.items()}
-        return JSONResponse({"settings": values, "field_types": field_types})
+        return ORJSONResponse({"settings": values, "field_types": field_types})
 
     @application.post("/api/settings")
     async def api_post_settings(request: Request):
         global _trie
-        from app.settings import update_settings, get_editable_settings
         body = await request.json()
 
         # Snapshot values that require trie rebuild
@@ -180,18 +184,17 @@ def create_app() -> FastAPI:
 
         errors = update_settings(settings, **body)
         if errors:
-            return JSONResponse({"updated": get_editable_settings(settings), "errors": errors}, status_code=400)
+            return ORJSONResponse({"updated": get_editable_settings(settings), "errors": errors}, status_code=400)
 
         # Rebuild trie if dictionary source or min word length changed
         if settings.COMMON_WORDS_ONLY != old_common or settings.MIN_WORD_LENGTH != old_min_len:
-            from app.solver import load_trie
             dict_path = settings.DICTIONARY_COMMON_PATH if settings.COMMON_WORDS_ONLY else settings.DICTIONARY_PATH
             logger.info("Rebuilding trie (common_only=%s, min_length=%d)", settings.COMMON_WORDS_ONLY, settings.MIN_WORD_LENGTH)
             _trie = load_trie(str(dict_path), settings.MIN_WORD_LENGTH)
             logger.info("Trie rebuilt")
 
         logger.info("Settings updated: %s", body)
-        return JSONResponse({"updated": get_editable_settings(settings)})
+        return ORJSONResponse({"updated": get_editable_settings(settings)})
 
     @application.get("/settings", response_class=HTMLResponse)
     async def settings_page():
@@ -328,19 +331,208 @@ load();
 """
 
 
+async def _read_capped(request: Request, limit: int) -> bytearray:
+    """Stream the request body, rejecting with 413 as soon as it exceeds ``limit``.
+
+    When Content-Length is given the buffer is allocated once at that size and
+    chunks are copied into place; the bytearray itself is returned, without a
+    final ``bytes()`` copy (everything downstream takes any bytes-like object).
+    """
+    content_length = request.headers.get("content-length")
+    declared = int(content_length) if content_length and content_length.isdigit() else None
+    if declared is not None and declared > limit:
+        raise HTTPException(413, f"File too large (max {limit} bytes)")
+
+    buf = bytearray(declared or 0)
+    size = 0
+    async for chunk in request.stream():
+        # Overwrites the preallocated bytes; grows the buffer if the body outruns the header
+        buf[size:size + len(chunk)] = chunk
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(413, f"File too large (max {limit} bytes)")
+    if size < len(buf):
+        del buf[size:]  # body shorter than its Content-Length
+    return buf
+
+
+async def _read_upload_capped(file: UploadFile, limit: int) -> bytes:
+    """Read a multipart upload, rejecting with 413 if it holds more than ``limit`` bytes.
+
+    Starlette has already spooled the part (to disk past 1 MB); reading at most
+    ``limit + 1`` bytes keeps an oversized one out of memory.
+    """
+    data = await file.read(limit + 1)
+    if len(data) > limit:
+        raise HTTPException(413, f"File too large (max {limit} bytes)")
+    return data
+
+
+# EXIF orientations the simplejpeg path can reproduce; mirrored ones go through cv2
+_JPEG_ROTATIONS = {
+    1: None,
+    3: cv2.ROTATE_180,
+    6: cv2.ROTATE_90_CLOCKWISE,
+    8: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def _jpeg_orientation(data: bytes) -> int:
+    """EXIF orientation tag of a JPEG: 1 when absent, 0 if the metadata can't be parsed.
+
+    Uploads are untrusted, so every offset is bounds-checked against its
+    segment; anything truncated or out of range returns 0 and the caller
+    falls back to cv2.imdecode.
+    """
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xDA:  # start of scan, no metadata past here
+            break
+        seg_len = int.from_bytes(data[pos + 2:pos + 4], "big")
+        end = pos + 2 + seg_len
+        if seg_len < 2 or end > len(data):
+            return 0
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            tiff = pos + 10
+            order = data[tiff:tiff + 2]
+            if order not in (b"II", b"MM") or tiff + 8 > end:
+                return 0
+            endian = "little" if order == b"II" else "big"
+            ifd = tiff + int.from_bytes(data[tiff + 4:tiff + 8], endian)
+            if ifd + 2 > end:
+                return 0
+            count = int.from_bytes(data[ifd:ifd + 2], endian)
+            if ifd + 2 + 12 * count > end:
+                return 0
+            for i in range(count):
+                entry = ifd + 2 + 12 * i
+                if int.from_bytes(data[entry:entry + 2], endian) == 0x0112:
+                    orientation = int.from_bytes(data[entry + 8:entry + 10], endian)
+                    return orientation if 1 <= orientation <= 8 else 0
+        pos = end
+    return 1
+
+
+def _decode_image(data: bytes | bytearray) -> np.ndarray:
+    """Decode upload bytes to BGR, using libjpeg-turbo via simplejpeg for JPEGs when available.
+
+    cv2.imdecode applies EXIF orientation, so the fast path rotates to match
+    and leaves anything it can't reproduce to cv2.
+    """
+    if simplejpeg is not None and data[:3] == b"\xff\xd8\xff":
+        orientation = _jpeg_orientation(data)
+        if orientation in _JPEG_ROTATIONS:
+            try:
+                image = simplejpeg.decode_jpeg(data, colorspace="BGR")
+            except ValueError:
+                image = None  # let cv2 have a go at it below
+            if image is not None:
+                rotation = _JPEG_ROTATIONS[orientation]
+                return image if rotation is None else cv2.rotate(image, rotation)
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise HTTPException(400, "Could not decode image")
+    return image
+
+
+def _raw_pixel_format(content_type: str) -> tuple[int, int, str] | None:
+    """Parse ``application/octet-stream; encoding=bgr; width=W; height=H`` into (height, width, encoding).
+
+    Returns None (decode as an encoded image) unless it's an octet-stream
+    with both dimensions given.
+    """
+    mime, _, params = content_type.partition(";")
+    if mime.strip().lower() != "application/octet-stream":
+        return None
+    fields = {}
+    for param in params.split(";"):
+        key, sep, value = param.partition("=")
+        if sep:
+            fields[key.strip().lower()] = value.strip().strip('"').lower()
+    try:
+        width, height = int(fields["width"]), int(fields["height"])
+    except (KeyError, ValueError):
+        return None
+    encoding = fields.get("encoding", "bgr")
+    if encoding not in ("bgr", "rgb") or width <= 0 or height <= 0:
+        raise HTTPException(400, f"Unsupported raw pixel format: {content_type}")
+    return height, width, encoding
+
+
+def _raw_image(data: bytes | bytearray, height: int, width: int, encoding: str) -> np.ndarray:
+    """View raw 8-bit BGR/RGB pixels as an image without decoding."""
+    expected = height * width * 3
+    if len(data) != expected:
+        raise HTTPException(400, f"Expected {expected} bytes for {width}x{height} {encoding.upper()}, got {len(data)}")
+    image = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if encoding == "rgb" else image
+
+
+def _run_cv_pipeline(
+    data: bytes | bytearray,
+    timer,
+    cfg: Settings,
+    raw_format: tuple[int, int, str] | None = None,
+    templates=None,
+    reader=None,
+):
+    """Decode → detect → split → recognize. Blocking; runs on the CV executor.
+
+    ``cfg`` is the request's settings snapshot; the global ``settings`` is
+    never read here. ``raw_format`` (height, width, encoding) marks ``data``
+    as undecoded pixels. ``templates``/``reader`` are the request's snapshot
+    of the startup globals.
+    """
+
+    with timer.stage("decode"):
+        logger.info("Received %d bytes", len(data))
+        image = _raw_image(data, *raw_format) if raw_format else _decode_image(data)
+
+    with timer.stage("board_detect"):
+        warped, debug_info = detect_board_and_warp(image, cfg.WARP_SIZE)
+
+    with timer.stage("grid_infer"):
+        grid_size = infer_grid_size(warped)
+
+    with timer.stage("cell_split"):
+        cells = split_cells(warped, grid_size, cfg.CELL_INSET)
+
+    with timer.stage("recognize"):
+        board, confidences = recognize_cells(
+            cells, templates, reader,
+            cfg.OCR_CONFIDENCE_THRESHOLD,
+            warped_gray=warped,
+            grid_size=grid_size,
+            skip_detector=cfg.EASYOCR_SKIP_DETECTOR,
+            strong_match_threshold=cfg.TEMPLATE_STRONG_MATCH_THRESHOLD or None,
+        )
+
+    return image, warped, debug_info, grid_size, cells, board, confidences
+
+
+def _render_cell_montage(data: bytes) -> bytes:
+    """Decode an upload and render its cell montage as PNG bytes. Blocking; runs on the CV executor."""
+    warp_size, cell_inset = settings.WARP_SIZE, settings.CELL_INSET
+    image = _decode_image(data)
+
+    warped, _ = detect_board_and_warp(image, warp_size)
+    grid_size = infer_grid_size(warped)
+    cells = split_cells(warped, grid_size, cell_inset)
+    montage = make_cell_montage(cells, grid_size)
+
+    _, buf = cv2.imencode(".png", montage)
+    return buf.tobytes()
+
+
 def _save_debug_artifacts(image, warped, cells, board, confidences, words, timer, grid_size, debug_info):
-    import cv2
-    import json
-    from datetime import datetime
-    from pathlib import Path
-    from app.cell_extract import make_cell_montage
-
-    from app.settings import settings as _s
-    debug_dir = _s.BASE_DIR / "debug"
+    debug_dir = settings.BASE_DIR / "debug"
     debug_dir.mkdir(exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    cv2.imwrite(str(debug_dir / f"{ts}_orig.png"), image)
+    # The original is a photo/screenshot; JPEG avoids a slow full-size PNG deflate
+    cv2.imwrite(str(debug_dir / f"{ts}_orig.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
     cv2.imwrite(str(debug_dir / f"{ts}_warp.png"), warped)
 
     montage = make_cell_montage(cells, grid_size)
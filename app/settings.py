@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 
 
-@dataclass
+@dataclass(slots=True)
 class Settings:
     BASE_DIR: Path = field(default_factory=lambda: Path(__file__).resolve().parent.parent)
 
@@ -18,6 +18,8 @@ class Settings:
 
     CELL_INSET: float = 0.15
     OCR_CONFIDENCE_THRESHOLD: float = 0.75
+    TEMPLATE_STRONG_MATCH_THRESHOLD: float = 0.0  # 0 disables the hole-count bypass
+    EASYOCR_SKIP_DETECTOR: bool = False
 
     MAX_UPLOAD_BYTES: int = 5_000_000
     COMMON_WORDS_ONLY: bool = True
@@ -25,7 +27,7 @@ class Settings:
     DEBUG: bool = False
 
     TORCH_NUM_THREADS: int = 4
-    WARP_SIZE: int = 400
+    WARP_SIZE: int = 420
     PORT: int = 10001
 
     DICTIONARY_COMMON_PATH: Path = field(init=False)
@@ -1,99 +1,556 @@
 from __future__ import annotations
 
+import heapq
+import logging
+import os
+import threading
+import zipfile
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # pure-Python DFS fallback
+    njit = None
+
+ALPHABET_SIZE = 26
+QU_CODE = 26  # cell code for the two-letter "QU" cell
+_Q = ord("Q") - 65
+_U = ord("U") - 65
+TRIE_FORMAT_VERSION = 1  # bump when the layout written by Trie.save changes
+
+logger = logging.getLogger("boggle")
+
 
 class TrieNode:
+    """Build-time scaffold: children indexed by letter code (ord(ch) - 65), None on leaves."""
     __slots__ = ("children", "is_word")
 
     def __init__(self):
-        self.children: dict[str, TrieNode] = {}
+        self.children: list[TrieNode | None] | None = None
         self.is_word: bool = False
 
 
 class Trie:
+    """Prefix tree built from TrieNodes, then frozen into a TrieTable for solving.
+
+    ``freeze()`` drops the node graph, so a frozen trie (or one loaded with
+    ``Trie.load``) can no longer be inserted into.
+    """
+
     def __init__(self):
-        self.root = TrieNode()
+        self.root: TrieNode | None = TrieNode()
+        self._table: TrieTable | None = None
 
     def insert(self, word: str):
+        """Insert an uppercase A-Z word."""
+        if self.root is None:
+            raise RuntimeError("cannot insert into a frozen trie")
         node = self.root
         for ch in word:
-            if ch not in node.children:
-                node.children[ch] = TrieNode()
-            node = node.children[ch]
+            code = ord(ch) - 65
+            children = node.children
+            if children is None:
+                children = node.children = [None] * ALPHABET_SIZE
+            nxt = children[code]
+            if nxt is None:
+                nxt = children[code] = TrieNode()
+            node = nxt
         node.is_word = True
 
+    def freeze(self) -> tuple[np.ndarray, np.ndarray]:
+        """Pack the trie into its successor matrix and release the TrieNodes.
 
-def load_trie(path: str, min_length: int = 3) -> Trie:
-    trie = Trie()
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            word = line.strip().upper()
-            if len(word) >= min_length and word.isalpha():
-                trie.insert(word)
-    return trie
+        Returns ``(children, is_word)``; see TrieTable for the layout.
+        """
+        if self._table is None:
+            self._table = build_trie_table(self)
+            self.root = None
+        return self._table.children, self._table.is_word
 
+    @property
+    def table(self) -> TrieTable:
+        """Flat array form of the trie used by the DFS (freezes on first use)."""
+        if self._table is None:
+            self.freeze()
+        return self._table
 
-def solve(board: list[list[str]], grid_size: int, trie: Trie, max_results: int = 50) -> tuple[list[str], dict[str, tuple[int, int]]]:
-    """Solve the Boggle board using DFS with Trie prefix pruning and bitmask visited tracking.
+    def save(self, path: str | BinaryIO):
+        """Write the frozen trie to an .npz file."""
+        table = self.table
+        np.savez(path, version=np.int32(TRIE_FORMAT_VERSION), children=table.children,
+                 is_word=table.is_word, parent=table.parent, letter=table.letter)
 
-    Returns (words, positions) where positions maps each word to its
-    topmost-leftmost starting cell (row, col).
+    @classmethod
+    def load(cls, path: str) -> Trie:
+        """Load a trie written by ``save``.
+
+        Raises ValueError if the file is from another format version or its
+        arrays don't have the shapes and dtypes ``save`` writes.
+        """
+        with np.load(path) as data:
+            version = int(data["version"]) if "version" in data.files else None
+            if version != TRIE_FORMAT_VERSION:
+                raise ValueError(f"trie format version {version}, expected {TRIE_FORMAT_VERSION}")
+            children, is_word, parent, letter = data["children"], data["is_word"], data["parent"], data["letter"]
+        _check_table_arrays(children, is_word, parent, letter)
+        return cls.from_table(TrieTable(children, is_word, parent, letter))
+
+    @classmethod
+    def from_table(cls, table: TrieTable) -> Trie:
+        """Wrap an already-built table as a frozen trie."""
+        trie = cls()
+        trie.root = None
+        trie._table = table
+        return trie
+
+
+class TrieTable:
+    """Trie packed into a contiguous successor matrix, node 0 is the root.
+
+    ``children[node, code]`` is the child node id (-1 if absent) for letter
+    codes 0-25; column QU_CODE holds the Q->U grandchild so a "QU" cell is one
+    lookup. ``is_word[node]`` marks terminal nodes and ``letter_mask[node]``
+    has bit ``code`` set for each present letter child. ``parent``/``letter``
+    let a found node id be turned back into its word.
     """
-    found: set[str] = set()
-    word_starts: dict[str, tuple[int, int]] = {}
-    total_cells = grid_size * grid_size
+    __slots__ = ("children", "is_word", "letter_mask", "parent", "letter")
+
+    def __init__(self, children: np.ndarray, is_word: np.ndarray, parent: np.ndarray, letter: np.ndarray):
+        self.children = children
+        self.is_word = is_word
+        letter_bits = np.left_shift(1, np.arange(ALPHABET_SIZE, dtype=np.int32))
+        self.letter_mask = (children[:, :ALPHABET_SIZE] >= 0).astype(np.int32) @ letter_bits
+        self.parent = parent
+        self.letter = letter
+
+    def word(self, node_id: int) -> str:
+        chars = []
+        while node_id > 0:
+            chars.append(chr(65 + int(self.letter[node_id])))
+            node_id = int(self.parent[node_id])
+        return "".join(reversed(chars))
+
+
+def _check_table_arrays(children: np.ndarray, is_word: np.ndarray, parent: np.ndarray, letter: np.ndarray):
+    """Raise ValueError unless the arrays form a table the DFS can index safely."""
+    n = len(parent) if parent.ndim == 1 else 0
+    layout = (
+        (children, (n, ALPHABET_SIZE + 1), np.int32),
+        (is_word, (n,), np.uint8),
+        (parent, (n,), np.int32),
+        (letter, (n,), np.int8),
+    )
+    if n == 0 or any(a.shape != shape or a.dtype != dtype for a, shape, dtype in layout):
+        raise ValueError("trie arrays have unexpected shapes or dtypes")
+    if children.min() < -1 or children.max() >= n or parent[1:].min(initial=0) < 0 or parent.max() >= n:
+        raise ValueError("trie arrays hold out-of-range node ids")
+
+
+def build_trie_table(trie: Trie) -> TrieTable:
+    """BFS-walk the TrieNode graph, assigning ids and packing children into a (N, 27) table."""
+    nodes = [trie.root]
+    parent = [-1]
+    letter = [-1]
+    queue = deque([0])
+    while queue:
+        node_id = queue.popleft()
+        children = nodes[node_id].children
+        if children is None:
+            continue
+        for code, child in enumerate(children):
+            if child is None:
+                continue
+            queue.append(len(nodes))
+            nodes.append(child)
+            parent.append(node_id)
+            letter.append(code)
+
+    is_word = np.fromiter((n.is_word for n in nodes), dtype=np.uint8, count=len(nodes))
+    return _pack_table(parent, letter, is_word)
+
+
+def _table_from_sorted_words(words: list[bytes]) -> TrieTable:
+    """Build the table straight from sorted uppercase A-Z words, without TrieNodes.
+
+    Each word only adds nodes past its common prefix with the previous word,
+    so nodes get depth-first ids in one pass over the list.
+    """
+    parent = [-1]
+    letter = [-1]
+    terminals = []
+    path = [0]  # node ids along the previous word, path[d] at depth d
+    prev = b""
+    for word in words:
+        common = 0
+        limit = min(len(word), len(prev))
+        while common < limit and word[common] == prev[common]:
+            common += 1
+        del path[common + 1:]
+        for ch in word[common:]:
+            path.append(len(parent))
+            parent.append(path[-2])
+            letter.append(ch - 65)
+        terminals.append(path[-1])
+        prev = word
+
+    is_word = np.zeros(len(parent), dtype=np.uint8)
+    is_word[terminals] = 1
+    return _pack_table(parent, letter, is_word)
+
+
+def _pack_table(parent: list[int], letter: list[int], is_word: np.ndarray) -> TrieTable:
+    """Assemble a TrieTable from per-node parent ids and letter codes (node 0 is the root)."""
+    parent_arr = np.array(parent, dtype=np.int32)
+    letter_arr = np.array(letter, dtype=np.int8)
+    children = np.full((len(parent), ALPHABET_SIZE + 1), -1, dtype=np.int32)
+    children[parent_arr[1:], letter_arr[1:]] = np.arange(1, len(parent), dtype=np.int32)
+    q_child = children[:, _Q]
+    children[:, QU_CODE] = np.where(q_child >= 0, children[q_child, _U], -1)
+    return TrieTable(children, is_word, parent_arr, letter_arr)
+
+
+def trie_cache_path(path: str, min_length: int) -> Path:
+    """Location of the frozen-trie cache for a dictionary, e.g. dictionary.min3.npz."""
+    return Path(path).with_suffix(f".min{min_length}.npz")
+
+
+def load_trie(path: str, min_length: int = 3, use_cache: bool = True) -> Trie:
+    """Load a dictionary into a frozen Trie.
+
+    The frozen arrays are cached next to the dictionary and reused while the
+    cache is at least as new as the dictionary file. A cache that can't be
+    read, or was written in another format, is rebuilt from the dictionary.
+    """
+    cache_path = trie_cache_path(path, min_length)
+    if use_cache:
+        try:
+            if cache_path.stat().st_mtime >= os.stat(path).st_mtime:
+                return Trie.load(str(cache_path))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            # Fall through to a rebuild, which overwrites the bad cache
+            logger.warning("Ignoring unreadable trie cache %s: %s", cache_path, e)
+
+    with open(path, "rb") as f:
+        data = f.read().upper()  # bytes.upper/isalpha are ASCII-only, which is what the trie holds
+    # One word per line; a line with inner spaces ("ICE CREAM") fails isalpha and is dropped
+    words = sorted({
+        word for word in (line.strip() for line in data.splitlines())
+        if len(word) >= min_length and word.isalpha()
+    })
+    trie = Trie.from_table(_table_from_sorted_words(words))
+
+    if use_cache:
+        # Write-then-rename so a concurrent reader never sees a partial file
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                trie.save(f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Could not write trie cache %s: %s", cache_path, e)
+            tmp_path.unlink(missing_ok=True)
+    return trie
+
+
+# Cell string -> kernel code; lowercase is accepted here so callers needn't .upper() every cell
+_CELL_CODES: dict[str, int] = {}
+for _code in range(ALPHABET_SIZE):
+    _CELL_CODES[chr(65 + _code)] = _CELL_CODES[chr(97 + _code)] = _code
+for _qu in ("QU", "Qu", "qu"):
+    _CELL_CODES[_qu] = QU_CODE
+del _code, _qu
+
+
+def _encode_cells(cell_chars: list[str]) -> np.ndarray:
+    """Map cell strings to kernel codes: 0-25 for A-Z, QU_CODE for "QU", -1 for anything else."""
+    return np.array([_CELL_CODES.get(chars, -1) for chars in cell_chars], dtype=np.int8)
+
+
+def _cell_letter_bits(cell_codes: np.ndarray) -> np.ndarray:
+    """Bit of each cell's first letter (Q for "QU"), 0 for unreadable cells."""
+    first = np.where(cell_codes == QU_CODE, _Q, cell_codes).astype(np.int32)
+    return np.where(cell_codes >= 0, np.left_shift(1, np.maximum(first, 0)), 0).astype(np.int32)
+
+
+# grid_size -> (nbr_off, nbr_idx, per-cell neighbor lists); boards only come in a few sizes
+_neighbor_cache: dict[int, tuple[np.ndarray, np.ndarray, list[list[int]]]] = {}
+
+
+def _get_neighbors(grid_size: int) -> tuple[np.ndarray, np.ndarray, list[list[int]]]:
+    """Memoized adjacency for a grid size: CSR arrays for the kernel, plain lists for the Python DFS."""
+    cached = _neighbor_cache.get(grid_size)
+    if cached is None:
+        nbr_off, nbr_idx = _neighbor_csr(grid_size)
+        offsets, indices = nbr_off.tolist(), nbr_idx.tolist()
+        lists = [indices[offsets[i]:offsets[i + 1]] for i in range(grid_size * grid_size)]
+        cached = _neighbor_cache[grid_size] = (nbr_off, nbr_idx, lists)
+    return cached
 
-    # Pre-expand cell values: most are single chars, "QU" is two chars
-    cell_chars: list[str] = []
-    for r in range(grid_size):
-        for c in range(grid_size):
-            cell_chars.append(board[r][c].upper())
 
-    # Precompute adjacency lists
-    neighbors: list[list[int]] = []
-    for idx in range(total_cells):
+def _neighbor_csr(grid_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """King-move adjacency as CSR arrays: neighbors of i are indices[offsets[i]:offsets[i+1]]."""
+    offsets = [0]
+    indices = []
+    for idx in range(grid_size * grid_size):
         r, c = divmod(idx, grid_size)
-        adj = []
         for dr in (-1, 0, 1):
             for dc in (-1, 0, 1):
                 if dr == 0 and dc == 0:
                     continue
                 nr, nc = r + dr, c + dc
                 if 0 <= nr < grid_size and 0 <= nc < grid_size:
-                    adj.append(nr * grid_size + nc)
-        neighbors.append(adj)
+                    indices.append(nr * grid_size + nc)
+        offsets.append(len(indices))
+    return np.array(offsets, dtype=np.int32), np.array(indices, dtype=np.int32)
 
-    def dfs(idx: int, node: TrieNode, path: list[str], visited: int, start_idx: int):
-        chars = cell_chars[idx]
-        if chars == "?":
-            return
 
-        # Walk trie through all characters in this cell (handles "QU")
-        current = node
-        for ch in chars:
-            if ch not in current.children:
-                return
-            current = current.children[ch]
-
-        path.append(chars)
-        if current.is_word:
-            word = "".join(path)
-            found.add(word)
-            sr, sc = divmod(start_idx, grid_size)
-            # Keep the topmost-leftmost starting position
-            if word not in word_starts or (sr, sc) < word_starts[word]:
-                word_starts[word] = (sr, sc)
-
-        if current.children:  # prune if no further prefixes
-            for nidx in neighbors[idx]:
-                if not (visited & (1 << nidx)):
-                    dfs(nidx, current, path, visited | (1 << nidx), start_idx)
+if njit is not None:
+    @njit(cache=True, nogil=True)
+    def _can_extend(node_mask, visited, cell, cell_bits, nbr_off, nbr_idx):
+        """True if some unvisited neighbor of ``cell`` starts a child of the node."""
+        avail = 0
+        for k in range(nbr_off[cell], nbr_off[cell + 1]):
+            nidx = nbr_idx[k]
+            if not visited & (np.int64(1) << nidx):
+                avail |= cell_bits[nidx]
+        return (avail & node_mask) != 0
+
+    @njit(cache=True, nogil=True)
+    def _dfs_from(start, children, is_word, letter_mask, cell_codes, cell_bits, nbr_off, nbr_idx, out_row):
+        """Iterative DFS from one start cell, writing terminal node ids into ``out_row``.
+
+        Returns the number of hits, which may exceed ``out_row.shape[0]``.
+        """
+        code = cell_codes[start]
+        if code < 0:
+            return 0
+        node = children[0, code]
+        if node < 0:
+            return 0
+        cap = out_row.shape[0]
+        n_found = 0
+        if is_word[node]:
+            out_row[0] = node
+            n_found = 1
+        visited = np.int64(1) << start
+        if not _can_extend(letter_mask[node], visited, start, cell_bits, nbr_off, nbr_idx):
+            return n_found
+
+        total = cell_codes.shape[0]
+        stack_cell = np.empty(total, np.int32)
+        stack_node = np.empty(total, np.int32)
+        stack_next = np.empty(total, np.int32)
+        depth = 0
+        stack_cell[0] = start
+        stack_node[0] = node
+        stack_next[0] = nbr_off[start]
+
+        while depth >= 0:
+            cell = stack_cell[depth]
+            k = stack_next[depth]
+            if k == nbr_off[cell + 1]:
+                # the cell's bit is known to be set, so xor clears it
+                visited ^= np.int64(1) << cell
+                depth -= 1
+                continue
+            stack_next[depth] = k + 1
+
+            nidx = nbr_idx[k]
+            bit = np.int64(1) << nidx
+            if visited & bit:
+                continue
+            code = cell_codes[nidx]
+            if code < 0:
+                continue
+            child = children[stack_node[depth], code]
+            if child < 0:
+                continue
+            if is_word[child]:
+                if n_found < cap:
+                    out_row[n_found] = child
+                n_found += 1
+
+            visited ^= bit
+            if not _can_extend(letter_mask[child], visited, nidx, cell_bits, nbr_off, nbr_idx):
+                visited ^= bit
+                continue
+            depth += 1
+            stack_cell[depth] = nidx
+            stack_node[depth] = child
+            stack_next[depth] = nbr_off[nidx]
+
+        return n_found
+
+    # Explicit signature so compilation (or the on-disk cache load) happens at
+    # import time rather than inside the first request
+    @njit(
+        "void(int32[:, ::1], uint8[::1], int32[::1], int8[::1], int32[::1], int32[::1], int32[::1],"
+        " int32[::1], int32[:, ::1], int32[::1])",
+        cache=True, nogil=True, parallel=True,
+    )
+    def _dfs_kernel(children, is_word, letter_mask, cell_codes, cell_bits, nbr_off, nbr_idx, starts, out, counts):
+        """DFS from each cell in ``starts`` over the successor matrix, one start per thread.
+
+        A node is only descended into when one of its child letters sits on an
+        unvisited neighbor (``letter_mask`` AND the neighbors' letter bits).
+
+        ``out[start, :]`` receives the word node ids hit from that start and
+        ``counts[start]`` the number of hits (which may exceed ``out.shape[1]``,
+        signalling the caller to retry with a larger buffer). Each start only
+        writes its own row, so threads never share output.
+        """
+        for i in prange(starts.shape[0]):
+            start = starts[i]
+            counts[start] = _dfs_from(
+                start, children, is_word, letter_mask, cell_codes, cell_bits, nbr_off, nbr_idx, out[start],
+            )
+
+# Results buffer per start cell; grows on overflow
+_KERNEL_START_CAP = 1024
+_MAX_KERNEL_CELLS = 63  # visited bitmask is one int64
+# Numba's workqueue threading layer (used when TBB/OpenMP aren't installed)
+# aborts on concurrent parallel launches, and solve() runs on executor threads
+_kernel_lock = threading.Lock()
+
+
+_symmetry_cache: dict[int, np.ndarray] = {}
+
+
+def _symmetry_perms(grid_size: int) -> np.ndarray:
+    """The 8 rotations/reflections of the grid as (8, N*N) cell-index permutations (memoized)."""
+    perms = _symmetry_cache.get(grid_size)
+    if perms is None:
+        idx = np.arange(grid_size * grid_size, dtype=np.int32).reshape(grid_size, grid_size)
+        views = [np.rot90(idx, k) for k in range(4)]
+        views += [v.T for v in views]
+        perms = _symmetry_cache[grid_size] = np.stack([v.reshape(-1) for v in views])
+    return perms
+
+
+def _canonical_starts(cell_codes: np.ndarray, grid_size: int) -> np.ndarray:
+    """Start cells that need their own DFS.
+
+    A rotation/reflection that maps every cell onto one with the same letter is
+    an automorphism of the board, so it sends each path from ``s`` to a path
+    with the same letters from its image and both starts find the same words.
+    Only the lowest (topmost-leftmost) cell of each such orbit is kept, which
+    also preserves the reported start positions.
+    """
+    perms = _symmetry_perms(grid_size)
+    preserving = perms[(cell_codes[perms] == cell_codes).all(axis=1)]  # always includes the identity
+    return np.flatnonzero(preserving.min(axis=0) == np.arange(cell_codes.shape[0])).astype(np.int32)
+
+
+def _solve_compiled(cell_chars: list[str], grid_size: int, table: TrieTable) -> tuple[set[str], dict[str, tuple[int, int]]]:
+    total_cells = grid_size * grid_size
+    cell_codes = _encode_cells(cell_chars)
+    cell_bits = _cell_letter_bits(cell_codes)
+    nbr_off, nbr_idx, _ = _get_neighbors(grid_size)
+    starts = _canonical_starts(cell_codes, grid_size)
+
+    cap = _KERNEL_START_CAP
+    while True:
+        out = np.empty((total_cells, cap), dtype=np.int32)
+        counts = np.zeros(total_cells, dtype=np.int32)
+        with _kernel_lock:
+            _dfs_kernel(
+                table.children, table.is_word, table.letter_mask, cell_codes, cell_bits, nbr_off, nbr_idx, starts,
+                out, counts,
+            )
+        if counts.max(initial=0) <= cap:
+            break
+        cap = int(counts.max())
+
+    # Starts are visited in row-major order, so the first start to reach a word
+    # is its topmost-leftmost one
+    first_start: dict[int, int] = {}
+    for start in starts.tolist():
+        for node_id in out[start, :counts[start]].tolist():
+            first_start.setdefault(node_id, start)
+    return _words_from_ids(table, first_start, grid_size)
 
-        path.pop()
 
-    for start in range(total_cells):
-        dfs(start, trie.root, [], 1 << start, start)
+def _words_from_ids(table: TrieTable, first_start: dict[int, int], grid_size: int) -> tuple[set[str], dict[str, tuple[int, int]]]:
+    """Turn {word node id: start cell index} into the word set and (row, col) starts."""
+    word_starts = {table.word(node_id): divmod(start, grid_size) for node_id, start in first_start.items()}
+    return set(word_starts), word_starts
+
+
+def solve(board: list[list[str]], grid_size: int, trie: Trie, max_results: int = 50) -> tuple[list[str], dict[str, tuple[int, int]]]:
+    """Solve the Boggle board using DFS with Trie prefix pruning and bitmask visited tracking.
+
+    Uses the Numba-compiled DFS over the trie's successor matrix when numba
+    is installed, otherwise a pure-Python walk of the same matrix.
+
+    Returns (words, positions) where positions maps each word to its
+    topmost-leftmost starting cell (row, col).
+    """
+    total_cells = grid_size * grid_size
+
+    # Flatten row-major; recognition already yields uppercase, and
+    # _encode_cells copes with lowercase, so no per-cell .upper()
+    cell_chars = [chars for row in board[:grid_size] for chars in row[:grid_size]]
+
+    if njit is not None and total_cells <= _MAX_KERNEL_CELLS:
+        found, word_starts = _solve_compiled(cell_chars, grid_size, trie.table)
+    else:
+        found, word_starts = _solve_python(cell_chars, grid_size, trie)
 
     # Sort: longest first, then alphabetical
-    result = sorted(found, key=lambda w: (-len(w), w))
-    result = result[:max_results] if max_results > 0 else result
+    if max_results > 0:
+        result = heapq.nsmallest(max_results, found, key=lambda w: (-len(w), w))
+    else:
+        # Alphabetical, then a stable sort by length keeps ties alphabetical
+        # (C-level str/len keys instead of a tuple-building lambda)
+        result = sorted(found)
+        result.sort(key=len, reverse=True)
     return result, word_starts
+
+
+def _solve_python(cell_chars: list[str], grid_size: int, trie: Trie) -> tuple[set[str], dict[str, tuple[int, int]]]:
+    neighbors = _get_neighbors(grid_size)[2]
+
+    # Successor-matrix column per cell; unreadable cells are -1
+    cell_code_arr = _encode_cells(cell_chars)
+    cell_codes: list[int] = cell_code_arr.tolist()
+    cell_bits: list[int] = _cell_letter_bits(cell_code_arr).tolist()
+
+    # memoryviews index like the arrays but return plain ints, avoiding
+    # numpy scalar overhead in the Python loop
+    table = trie.table
+    children = table.children.data
+    is_word = table.is_word.data
+    letter_mask = table.letter_mask.data
+
+    # Words are tracked by terminal node id and only spelled out at the end
+    first_start: dict[int, int] = {}
+
+    def dfs(idx: int, node: int, visited: int, start_idx: int):
+        code = cell_codes[idx]
+        if code < 0:
+            return
+        current = children[node, code]
+        if current < 0:
+            return
+
+        # Starts run in row-major order, so the first hit is the topmost-leftmost
+        if is_word[current] and current not in first_start:
+            first_start[current] = start_idx
+
+        # Only recurse into unvisited neighbors whose letter bit is in the node's child mask
+        mask = letter_mask[current]
+        if mask:  # prune if no further prefixes
+            for nidx in neighbors[idx]:
+                if mask & cell_bits[nidx] and not (visited & (1 << nidx)):
+                    dfs(nidx, current, visited | (1 << nidx), start_idx)
+
+    for start in _canonical_starts(cell_code_arr, grid_size).tolist():
+        dfs(start, 0, 1 << start, start)
+
+    return _words_from_ids(table, first_start, grid_size)
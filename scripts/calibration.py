@@ -3,11 +3,13 @@ Calibration helper for Boggle Solver.
 
 Usage:
     python -m scripts.calibration <screenshot_path> [--grid-size N]
+    python -m scripts.calibration --batch-dir <screenshots_dir> [--grid-size N]
 
 Examples:
     python -m scripts.calibration screenshots/sample.png
     python -m scripts.calibration screenshots/5x5.png --grid-size 5
     python -m scripts.calibration screenshots/sample.png --save-templates
+    python -m scripts.calibration --batch-dir screenshots/
 
 This will:
   1. Auto-detect the board region and perspective-warp it
@@ -15,9 +17,14 @@ This will:
   3. Split into cells and display a montage for visual verification
   4. Run OCR on each cell and print the detected board
   5. Optionally save cell crops as letter templates (--save-templates)
+
+With --batch-dir every image in the directory is calibrated in turn, each
+into its own subdirectory of the output directory. --tflite-model swaps the
+EasyOCR fallback for a user-supplied TFLite letter classifier.
 """
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import cv2
@@ -30,35 +37,135 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from app.settings import settings
 from app.board_detect import detect_board_and_warp, infer_grid_size
 from app.cell_extract import split_cells, preprocess_cell, make_cell_montage
-from app.recognition import load_templates, _template_match, init_easyocr, _clean_ocr_text
+from app.recognition import (
+    load_templates, _template_scores, init_easyocr, _clean_ocr_text,
+)
+
+OCR_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+class TFLiteLetterClassifier:
+    """Single-letter classifier over preprocessed 64x64 cells, backed by a TFLite model.
+
+    The model takes a float32 (N, 64, 64, 1) batch scaled to [0, 1] and returns
+    (N, 26) class probabilities in A-Z order. A whole batch of cells is one
+    ``invoke()``.
+    """
+
+    def __init__(self, interpreter):
+        self._interpreter = interpreter
+        self._input_index = interpreter.get_input_details()[0]["index"]
+        self._output_index = interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+
+    def classify(self, cells_processed: np.ndarray) -> list[tuple[str, float]]:
+        """Return (letter, probability) for each cell of an (N, 64, 64) uint8 stack."""
+        if len(cells_processed) == 0:
+            return []
+        batch = (cells_processed.astype(np.float32) / 255.0)[..., None]
+        if self._batch_size != len(batch):
+            self._interpreter.resize_tensor_input(self._input_index, batch.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = len(batch)
+        self._interpreter.set_tensor(self._input_index, batch)
+        self._interpreter.invoke()
+        probs = self._interpreter.get_tensor(self._output_index)
+        best = probs.argmax(axis=1)
+        return [(chr(ord("A") + int(k)), float(probs[i, k])) for i, k in enumerate(best)]
+
+
+# Loaded on first use and reused for every image in the run
+_tflite_classifier = None
+
+
+def init_tflite_classifier(model_path: str, num_threads: int | None = None) -> TFLiteLetterClassifier | None:
+    """Load the TFLite letter classifier, reusing it if already loaded.
+
+    Uses ``tflite_runtime`` when installed, else ``tensorflow.lite``. Returns
+    None if neither is available or the model file is missing.
+    """
+    global _tflite_classifier
+    if _tflite_classifier is not None:
+        return _tflite_classifier
+
+    if not Path(model_path).exists():
+        print(f"Error: TFLite letter model not found: {model_path}")
+        return None
+    try:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        interpreter = Interpreter(model_path=str(model_path), num_threads=num_threads)
+        interpreter.allocate_tensors()
+        _tflite_classifier = TFLiteLetterClassifier(interpreter)
+        print(f"TFLite letter classifier loaded from {model_path}")
+        return _tflite_classifier
+    except Exception as e:
+        print(f"Error: failed to init TFLite classifier: {e}")
+        return None
 
 
 def main():
     parser = argparse.ArgumentParser(description="Boggle Solver Calibration Tool")
-    parser.add_argument("screenshot", help="Path to a screenshot image")
+    parser.add_argument("screenshot", nargs="?", help="Path to a screenshot image")
+    parser.add_argument("--batch-dir", type=str, default=None,
+                        help="Calibrate every screenshot in this directory instead of a single image")
     parser.add_argument("--grid-size", type=int, choices=[4, 5, 6], default=None,
                         help="Override auto-detected grid size")
     parser.add_argument("--save-templates", action="store_true",
                         help="Save each cell crop as a letter template (prompts for labels)")
     parser.add_argument("--warp-size", type=int, default=settings.WARP_SIZE,
                         help=f"Warp target size in pixels (default: {settings.WARP_SIZE})")
+    parser.add_argument("--tflite-model", type=str, default=None,
+                        help="Classify uncertain cells with this TFLite letter model instead of EasyOCR")
+    parser.add_argument("--tflite-threads", type=int, default=None,
+                        help="CPU threads for the TFLite interpreter (default: its own default)")
     parser.add_argument("--output-dir", type=str, default="calibration_output",
                         help="Directory to save debug outputs (default: calibration_output)")
     args = parser.parse_args()
 
-    img_path = Path(args.screenshot)
-    if not img_path.exists():
-        print(f"Error: {img_path} does not exist")
-        sys.exit(1)
+    if (args.screenshot is None) == (args.batch_dir is None):
+        parser.error("give either a screenshot path or --batch-dir")
 
     output_dir = Path(args.output_dir)
     output_dir.mkdir(exist_ok=True)
+    templates = load_templates(str(settings.TEMPLATES_DIR))
+
+    if args.batch_dir is None:
+        if not calibrate_image(Path(args.screenshot), args, output_dir, templates):
+            sys.exit(1)
+        print(f"\nAll outputs saved to: {output_dir}/")
+        return
+
+    batch_dir = Path(args.batch_dir)
+    if not batch_dir.is_dir():
+        print(f"Error: {batch_dir} is not a directory")
+        sys.exit(1)
+    images = sorted(p for p in batch_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    failed = 0
+    for img_path in images:
+        print(f"\n===== {img_path.name} =====")
+        image_dir = output_dir / img_path.stem
+        image_dir.mkdir(exist_ok=True)
+        if not calibrate_image(img_path, args, image_dir, templates):
+            failed += 1
+    print(f"\nCalibrated {len(images) - failed}/{len(images)} image(s); outputs saved to: {output_dir}/")
+
+
+def calibrate_image(img_path: Path, args, output_dir: Path, templates) -> bool:
+    """Run detection, cell extraction and OCR on one screenshot. Returns False if it can't be read."""
+    if not img_path.exists():
+        print(f"Error: {img_path} does not exist")
+        return False
 
     # Load image
     image = cv2.imread(str(img_path), cv2.IMREAD_COLOR)
     if image is None:
         print(f"Error: Could not decode image at {img_path}")
-        sys.exit(1)
+        return False
 
     print(f"Image: {img_path} ({image.shape[1]}x{image.shape[0]})")
 
@@ -92,76 +199,50 @@ def main():
 
     # Step 4: OCR each cell
     print(f"\n--- OCR Results ---")
-    templates = load_templates(str(settings.TEMPLATES_DIR))
 
-    # Try template matching first
-    board = []
-    processed_cells = [preprocess_cell(c) for c in cells]
+    # Preprocess straight into one (N, 64, 64) stack so the whole board is scored in one pass
+    processed_cells = np.empty((len(cells), 64, 64), dtype=np.uint8)
+    for i, c in enumerate(cells):
+        preprocess_cell(c, out=processed_cells[i])
 
+    # Try template matching first
     use_easyocr = False
     if templates:
         print(f"Using Tier A (template matching, {len(templates)} templates loaded)")
-        for i, cell_proc in enumerate(processed_cells):
-            letter, conf = _template_match(cell_proc, templates)
-            if conf < settings.OCR_CONFIDENCE_THRESHOLD:
-                use_easyocr = True
-            board.append((letter, conf))
+        scores = _template_scores(processed_cells, templates)
+        best = scores.argmax(axis=1)
+        board = [(templates.letters[k], float(scores[i, k])) for i, k in enumerate(best)]
+        use_easyocr = any(conf < settings.OCR_CONFIDENCE_THRESHOLD for _, conf in board)
     else:
         print("No templates found — using EasyOCR directly")
         use_easyocr = True
         board = [("?", 0.0)] * len(cells)
 
-    # EasyOCR fallback
+    # Tier B fallback: TFLite classifier if enabled and loadable, else EasyOCR
     if use_easyocr:
-        print("Initializing EasyOCR for uncertain cells...")
-        reader = init_easyocr()
-        if reader:
-            for i, cell in enumerate(cells):
-                if board[i][1] < settings.OCR_CONFIDENCE_THRESHOLD:
-                    try:
-                        results = reader.readtext(
-                            cell,
-                            allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ",
-                            detail=1,
-                            paragraph=False,
-                        )
-                        if results:
-                            text = _clean_ocr_text(results[0][1])
-                            conf = float(results[0][2])
-                            if text and conf > board[i][1]:
-                                board[i] = (text, conf)
-                        else:
-                            if board[i][0] == "?":
-                                board[i] = ("?", 0.0)
-                    except Exception as e:
-                        print(f"  EasyOCR error on cell {i}: {e}")
+        uncertain_idx = [i for i, (_, conf) in enumerate(board)
+                         if conf < settings.OCR_CONFIDENCE_THRESHOLD]
+        classifier = None
+        if args.tflite_model:
+            print("Loading TFLite letter classifier for uncertain cells...")
+            classifier = init_tflite_classifier(args.tflite_model, args.tflite_threads)
+        if classifier:
+            if uncertain_idx:
+                batch = processed_cells[uncertain_idx]
+                for i, (letter, conf) in zip(uncertain_idx, classifier.classify(batch)):
+                    if conf > board[i][1]:
+                        board[i] = (letter, conf)
+        else:
+            print("Initializing EasyOCR for uncertain cells...")
+            reader = init_easyocr(settings.TORCH_NUM_THREADS)
+            if reader and uncertain_idx:
+                _ocr_uncertain_cells(reader, cells, board, uncertain_idx)
 
     # Handle Q -> QU
     board = [(("QU" if l == "Q" else l), c) for l, c in board]
 
-    # Print board
-    print(f"\nDetected board ({grid_size}x{grid_size}):")
-    print("-" * (grid_size * 6 + 1))
-    for r in range(grid_size):
-        row_letters = []
-        row_confs = []
-        for c in range(grid_size):
-            idx = r * grid_size + c
-            letter, conf = board[idx]
-            row_letters.append(f" {letter:>2} ")
-            row_confs.append(f"{conf:.2f}")
-        print("|" + "|".join(row_letters) + "|")
-    print("-" * (grid_size * 6 + 1))
-
-    print("\nConfidences:")
-    for r in range(grid_size):
-        confs = []
-        for c in range(grid_size):
-            idx = r * grid_size + c
-            _, conf = board[idx]
-            marker = " " if conf >= settings.OCR_CONFIDENCE_THRESHOLD else "!"
-            confs.append(f"{conf:.2f}{marker}")
-        print(f"  Row {r}: {' '.join(confs)}")
+    # Print board and confidences in one write
+    sys.stdout.write(_format_board(board, grid_size))
 
     low_conf = sum(1 for _, c in board if c < settings.OCR_CONFIDENCE_THRESHOLD)
     if low_conf > 0:
@@ -171,7 +252,65 @@ def main():
     if args.save_templates:
         _save_templates_interactive(processed_cells, board, grid_size)
 
-    print(f"\nAll outputs saved to: {output_dir}/")
+    return True
+
+
+def _format_board(board, grid_size):
+    """Render the detected letters and per-row confidences as one block of text."""
+    threshold = settings.OCR_CONFIDENCE_THRESHOLD
+    rule = "-" * (grid_size * 6 + 1)
+    rows = [board[r * grid_size:(r + 1) * grid_size] for r in range(grid_size)]
+    lines = [f"\nDetected board ({grid_size}x{grid_size}):", rule]
+    lines += ["|" + "|".join(f" {letter:>2} " for letter, _ in row) + "|" for row in rows]
+    lines += [rule, "", "Confidences:"]
+    lines += [
+        f"  Row {r}: " + " ".join(f"{conf:.2f}{' ' if conf >= threshold else '!'}" for _, conf in row)
+        for r, row in enumerate(rows)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _apply_ocr_result(board, i, results):
+    """Keep the top EasyOCR reading for cell ``i`` if it beats the current one."""
+    if results:
+        text = _clean_ocr_text(results[0][1])
+        conf = float(results[0][2])
+        if text and conf > board[i][1]:
+            board[i] = (text, conf)
+
+
+def _ocr_uncertain_cells(reader, cells, board, uncertain_idx):
+    """Run EasyOCR on the uncertain cells in one batched call, updating ``board`` in place.
+
+    Falls back to one ``readtext`` call per cell if the batched call fails.
+    """
+    batch = [cells[i] for i in uncertain_idx]
+    try:
+        batched = reader.readtext_batched(
+            batch,
+            allowlist=OCR_ALLOWLIST,
+            detail=1,
+            paragraph=False,
+            batch_size=len(batch),
+        )
+    except Exception as e:
+        print(f"  Batched EasyOCR failed ({e}), retrying per cell")
+    else:
+        for i, results in zip(uncertain_idx, batched):
+            _apply_ocr_result(board, i, results)
+        return
+
+    for i in uncertain_idx:
+        try:
+            results = reader.readtext(
+                cells[i],
+                allowlist=OCR_ALLOWLIST,
+                detail=1,
+                paragraph=False,
+            )
+            _apply_ocr_result(board, i, results)
+        except Exception as e:
+            print(f"  EasyOCR error on cell {i}: {e}")
 
 
 def _save_templates_interactive(processed_cells, board, grid_size):
@@ -183,7 +322,8 @@ def _save_templates_interactive(processed_cells, board, grid_size):
     print(f"Templates directory: {templates_dir}")
     print("For each cell, enter the correct letter (or press Enter to use detected, 's' to skip):\n")
 
-    saved = 0
+    # Collect labels first; a letter labelled twice keeps its last crop, as overwriting did
+    to_save: dict[str, np.ndarray] = {}
     for i, cell_proc in enumerate(processed_cells):
         r, c = divmod(i, grid_size)
         detected = board[i][0]
@@ -201,10 +341,22 @@ def _save_templates_interactive(processed_cells, board, grid_size):
             print(f"    Skipping invalid: '{letter}'")
             continue
 
+        to_save[letter] = cell_proc
+
+    # cv2.imwrite releases the GIL; the templates are tiny, so favour speed over PNG size
+    def write(item):
+        letter, cell_proc = item
         tpl_path = templates_dir / f"{letter}.png"
-        cv2.imwrite(str(tpl_path), cell_proc)
-        print(f"    Saved: {tpl_path}")
-        saved += 1
+        return tpl_path, cv2.imwrite(str(tpl_path), cell_proc, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+    saved = 0
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for tpl_path, ok in ex.map(write, to_save.items()):
+            if ok:
+                print(f"    Saved: {tpl_path}")
+                saved += 1
+            else:
+                print(f"    Failed to write: {tpl_path}")
 
     print(f"\n{saved} templates saved to {templates_dir}")
 
@@ -1,10 +1,24 @@
-"""Find all cells where EasyOCR and template matching disagree."""
+"""Find all cells where EasyOCR and template matching disagree.
+
+Reads the ``<timestamp>_result.json`` / ``<timestamp>_warp.png`` pairs the
+server writes to debug/. The server only saves them when ``DEBUG`` is on
+(off by default), so run it with DEBUG=true to collect data first. The
+original upload (``_orig.jpg``, formerly ``_orig.png``) isn't used here.
+"""
 import cv2
 import json
+import numpy as np
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
@@ -13,31 +27,53 @@ from app.cell_extract import split_cells, preprocess_cell
 from app.recognition import load_templates, _template_match_verified
 
 templates = load_templates(str(settings.TEMPLATES_DIR))
+# Offline scan, so near-exact matches skip the hole count even though the
+# server leaves that off by default; TEMPLATE_STRONG_MATCH_THRESHOLD overrides
+STRONG_MATCH_THRESHOLD = settings.TEMPLATE_STRONG_MATCH_THRESHOLD or 0.95
 debug_dir = PROJECT_ROOT / "debug"
 
-disagreements = []
-for fname in sorted(os.listdir(debug_dir)):
-    if not fname.endswith("_result.json"):
-        continue
-    ts = fname.replace("_result.json", "")
-    with open(debug_dir / fname) as f:
-        result = json.load(f)
+
+def process(task):
+    """Return the disagreement rows for one saved debug result."""
+    ts, result_path, warp_path = task
+    result = _loads(result_path.read_bytes())
     board = result["board"]
     confs = result["confidences"]
     grid_size = result["grid_size"]
-    warped = cv2.imread(str(debug_dir / f"{ts}_warp.png"), cv2.IMREAD_GRAYSCALE)
+    warped = cv2.imread(str(warp_path), cv2.IMREAD_GRAYSCALE)
     if warped is None:
-        continue
+        return []
     cells = split_cells(warped, grid_size, settings.CELL_INSET)
+    # One scratch buffer per task: tasks run concurrently, cells within one don't
+    buf = np.empty((64, 64), np.uint8)
+    rows = []
     for r in range(grid_size):
         for c in range(grid_size):
             idx = r * grid_size + c
-            proc = preprocess_cell(cells[idx])
-            tpl_letter, tpl_conf = _template_match_verified(proc, templates)
+            proc = preprocess_cell(cells[idx], out=buf)
+            tpl_letter, tpl_conf = _template_match_verified(
+                proc, templates, strong_match=STRONG_MATCH_THRESHOLD
+            )
             ocr_letter = board[r][c]
             ocr_conf = confs[r][c]
             if tpl_letter != ocr_letter and tpl_conf > 0.5:
-                disagreements.append((ts, r, c, ocr_letter, ocr_conf, tpl_letter, tpl_conf))
+                rows.append((ts, r, c, ocr_letter, ocr_conf, tpl_letter, tpl_conf))
+    return rows
+
+
+# Reads, PNG decodes and the cv2/NumPy matching release the GIL, so a thread
+# pool overlaps them across results
+timestamps = [
+    fname[: -len("_result.json")]
+    for fname in sorted(os.listdir(debug_dir))
+    if fname.endswith("_result.json")
+]
+tasks = [(ts, debug_dir / f"{ts}_result.json", debug_dir / f"{ts}_warp.png") for ts in timestamps]
+
+disagreements = []
+with ThreadPoolExecutor(max_workers=8) as ex:
+    for rows in ex.map(process, tasks):
+        disagreements.extend(rows)
 
 print(f"Total disagreements: {len(disagreements)}")
 print()
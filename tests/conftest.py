@@ -0,0 +1,22 @@
+import pytest
+
+from app.solver import Trie, load_trie
+
+
+@pytest.fixture(scope="session")
+def trie_cache():
+    """Return ``get(path, min_length)``, building each dictionary's trie once per session.
+
+    ``solve`` never mutates a trie, so tests can share the loaded instances. The
+    on-disk trie cache is bypassed so test runs don't leave .npz files next
+    to the dictionaries.
+    """
+    cache: dict[tuple[str, int], Trie] = {}
+
+    def get(path: str, min_length: int) -> Trie:
+        key = (path, min_length)
+        if key not in cache:
+            cache[key] = load_trie(path, min_length, use_cache=False)
+        return cache[key]
+
+    return get
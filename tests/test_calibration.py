@@ -0,0 +1,42 @@
+import numpy as np
+
+from scripts.calibration import TFLiteLetterClassifier, init_tflite_classifier
+
+
+class _FakeInterpreter:
+    """Stands in for a TFLite interpreter: class k scores highest when cell mean is k."""
+
+    def get_input_details(self):
+        return [{"index": 0}]
+
+    def get_output_details(self):
+        return [{"index": 1}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = tuple(shape)
+
+    def allocate_tensors(self):
+        pass
+
+    def set_tensor(self, index, value):
+        assert value.dtype == np.float32 and value.shape == self.shape
+        self.batch = value
+
+    def invoke(self):
+        k = np.rint(self.batch.mean(axis=(1, 2, 3)) * 255).astype(int)
+        self.probs = np.full((len(k), 26), 0.01, dtype=np.float32)
+        self.probs[np.arange(len(k)), k] = 0.75
+
+    def get_tensor(self, index):
+        return self.probs
+
+
+def test_tflite_classifier_batches_cells():
+    classifier = TFLiteLetterClassifier(_FakeInterpreter())
+    cells = np.stack([np.full((64, 64), k, dtype=np.uint8) for k in (0, 2, 16)])
+    assert classifier.classify(cells) == [("A", 0.75), ("C", 0.75), ("Q", 0.75)]
+    assert classifier.classify(cells[:0]) == []
+
+
+def test_init_tflite_classifier_missing_model():
+    assert init_tflite_classifier("/nonexistent/letters.tflite") is None
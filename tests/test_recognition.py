@@ -1,7 +1,12 @@
 import cv2
 import numpy as np
 import pytest
-from app.recognition import _clean_ocr_text, _template_match, load_templates
+from app.cell_extract import preprocess_cell
+from app.recognition import (
+    _clean_ocr_text, _disambiguate_cg, _disambiguate_rp, _generate_synthetic_templates, _template_match,
+    _template_match_verified, _template_scores, load_templates, recognize_cells,
+)
+from app.settings import settings
 
 
 def test_clean_ocr_basic():
@@ -56,3 +61,62 @@ def test_template_match_synthetic():
     letter, conf = _template_match(test_cell, templates)
     assert letter == "A"
     assert conf > 0.5
+
+
+def test_template_scores_match_opencv():
+    """Batched scores should agree with per-template cv2.matchTemplate."""
+    templates = _generate_synthetic_templates()
+    rng = np.random.default_rng(0)
+    cell = rng.integers(0, 256, (64, 64), dtype=np.uint8)
+
+    expected = [cv2.matchTemplate(cell, tpl, cv2.TM_CCOEFF_NORMED).max() for tpl in templates.values()]
+    np.testing.assert_allclose(_template_scores(cell, templates), expected, atol=1e-5)
+
+
+def test_strong_match_skips_hole_check(monkeypatch):
+    """A near-exact template match is accepted without counting holes; weaker ones still are."""
+    from app import recognition
+
+    templates = _generate_synthetic_templates()
+    cell = templates["A"].copy()
+    expected = _template_match_verified(cell, templates)
+
+    def no_holes(_):
+        raise AssertionError("hole count should be skipped")
+
+    monkeypatch.setattr(recognition, "_count_holes", no_holes)
+    letter, conf = _template_match_verified(cell, templates, strong_match=0.95)
+    assert (letter, conf) == expected
+    assert conf >= 0.95
+    with pytest.raises(AssertionError):
+        _template_match_verified(cell, templates, strong_match=1.01)
+
+
+def test_board_and_single_cell_paths_agree_on_game_templates():
+    """recognize_cells and _template_match_verified pick the same letter for every cell.
+
+    Cells are the game-font templates, plain and with shifted, thickened and
+    thinned strokes, so the structural R/P and C/G checks see real glyphs.
+    """
+    templates = load_templates(str(settings.TEMPLATES_DIR))
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    cells = []
+    for letter in ("R", "P", "C", "G"):
+        glyph = templates[letter]
+        cells += [
+            glyph,
+            np.roll(glyph, (3, -2), axis=(0, 1)),
+            cv2.erode(glyph, kernel),  # dark strokes on light: erode thickens
+            cv2.dilate(glyph, kernel),
+        ]
+
+    board, _ = recognize_cells(cells, templates, None, grid_size=4)
+    letters = [letter for row in board for letter in row]
+    for cell, letter in zip(cells, letters):
+        processed = preprocess_cell(cell)
+        assert letter == _template_match_verified(processed, templates)[0]
+        if letter in ("R", "P"):
+            assert letter == _disambiguate_rp(processed)
+        elif letter in ("C", "G"):
+            assert letter == _disambiguate_cg(processed)
+    assert letters[::4] == ["R", "P", "C", "G"]
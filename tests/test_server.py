@@ -0,0 +1,263 @@
+import asyncio
+import json
+import warnings
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import server
+from app.server import _decode_image, _jpeg_orientation, _raw_image, _raw_pixel_format, _read_capped
+from app.settings import settings
+from app.solver import Trie
+
+
+@pytest.fixture
+def client():
+    # No context manager: the lifespan (dictionary, templates, EasyOCR) isn't
+    # needed for requests rejected before the pipeline runs
+    return TestClient(server.app)
+
+
+def _sample_jpeg() -> bytes:
+    """A small JPEG with a distinct corner so rotations and flips are distinguishable."""
+    img = np.full((48, 64, 3), 40, dtype=np.uint8)
+    img[:16, :24] = (0, 0, 255)
+    img[-8:, -32:] = (255, 255, 0)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    return buf.tobytes()
+
+
+def _exif_segment(orientation: int, order: bytes = b"II", ifd_offset: int = 8) -> bytes:
+    """APP1 segment holding a TIFF header and an IFD with just the orientation tag."""
+    endian = "little" if order == b"II" else "big"
+    tiff = order + (42).to_bytes(2, endian) + ifd_offset.to_bytes(4, endian)
+    tiff += (1).to_bytes(2, endian)  # one IFD entry
+    tiff += (0x0112).to_bytes(2, endian) + (3).to_bytes(2, endian) + (1).to_bytes(4, endian)
+    tiff += orientation.to_bytes(2, endian) + b"\x00\x00"
+    tiff += (0).to_bytes(4, endian)  # no next IFD
+    payload = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def _with_segment(jpeg: bytes, segment: bytes) -> bytes:
+    return jpeg[:2] + segment + jpeg[2:]
+
+
+def _cv2_decode(data: bytes) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _assert_same_image(a: np.ndarray, b: np.ndarray):
+    assert a.shape == b.shape
+    # simplejpeg's libjpeg-turbo and OpenCV's libjpeg may round a few pixels differently
+    assert np.abs(a.astype(np.int16) - b.astype(np.int16)).mean() < 1.0
+
+
+@pytest.mark.parametrize("order", [b"II", b"MM"])
+@pytest.mark.parametrize("orientation", range(1, 9))
+def test_decode_applies_exif_orientation_like_cv2(orientation, order):
+    data = _with_segment(_sample_jpeg(), _exif_segment(orientation, order))
+    assert _jpeg_orientation(data) == orientation
+    _assert_same_image(_decode_image(data), _cv2_decode(data))
+
+
+def test_jpeg_orientation_without_app1():
+    assert _jpeg_orientation(_sample_jpeg()) == 1
+
+
+def test_jpeg_orientation_rejects_truncated_segment():
+    data = _with_segment(_sample_jpeg(), _exif_segment(6))
+    assert _jpeg_orientation(data[:12]) == 0
+    # Segment length pointing past the end of the body
+    assert _jpeg_orientation(b"\xff\xd8\xff\xe1\xff\xff" + b"Exif\x00\x00II") == 0
+
+
+def test_jpeg_orientation_rejects_bogus_ifd_offset():
+    data = _with_segment(_sample_jpeg(), _exif_segment(6, ifd_offset=0x7FFFFFF0))
+    assert _jpeg_orientation(data) == 0
+    # The bad metadata just routes the upload through cv2.imdecode
+    _assert_same_image(_decode_image(data), _cv2_decode(data))
+
+
+def test_decode_non_jpeg_body():
+    img = np.zeros((20, 30, 3), dtype=np.uint8)
+    png = cv2.imencode(".png", img)[1].tobytes()
+    assert _decode_image(png).shape == (20, 30, 3)
+    with pytest.raises(HTTPException) as exc:
+        _decode_image(b"definitely not an image")
+    assert exc.value.status_code == 400
+
+
+def test_decode_falls_back_to_cv2_without_simplejpeg(monkeypatch):
+    data = _with_segment(_sample_jpeg(), _exif_segment(6))
+    monkeypatch.setattr(server, "simplejpeg", None)
+    _assert_same_image(_decode_image(data), _cv2_decode(data))
+
+
+def test_decode_falls_back_to_cv2_when_simplejpeg_raises(monkeypatch):
+    class _Failing:
+        @staticmethod
+        def decode_jpeg(data, colorspace):
+            raise ValueError("corrupt")
+
+    data = _with_segment(_sample_jpeg(), _exif_segment(8, b"MM"))
+    monkeypatch.setattr(server, "simplejpeg", _Failing)
+    _assert_same_image(_decode_image(data), _cv2_decode(data))
+
+
+class _StreamedRequest:
+    """Just enough of a Starlette Request for _read_capped."""
+
+    def __init__(self, chunks: list[bytes], content_length: int | None):
+        self.headers = {} if content_length is None else {"content-length": str(content_length)}
+        self._chunks = chunks
+
+    async def stream(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+@pytest.mark.parametrize("content_length", [None, 9, 4, 20])
+def test_read_capped_assembles_body(content_length):
+    """Content-Length only sizes the buffer; the streamed bytes decide the result."""
+    body = asyncio.run(_read_capped(_StreamedRequest([b"abc", b"defg", b"hi"], content_length), 100))
+    assert body == b"abcdefghi"
+
+
+def test_read_capped_rejects_oversized_stream():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_read_capped(_StreamedRequest([b"x" * 6, b"x" * 6], None), 10))
+    assert exc.value.status_code == 413
+
+
+def test_raw_body_too_large_returns_413(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    resp = client.post("/solve", content=b"\xff" * 1001, headers={"content-type": "image/jpeg"})
+    assert resp.status_code == 413
+
+
+def test_multipart_upload_too_large_returns_413(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    resp = client.post("/solve", files={"file": ("board.jpg", b"\xff" * 1001, "image/jpeg")})
+    assert resp.status_code == 413
+
+
+def test_debug_cells_upload_too_large_returns_413(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    resp = client.post("/debug/cells", files={"file": ("board.jpg", b"\xff" * 1001, "image/jpeg")})
+    assert resp.status_code == 413
+
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/octet-stream; width=4; height=3", (3, 4, "bgr")),
+    ("application/octet-stream; encoding=rgb; width=4; height=3", (3, 4, "rgb")),
+    ('Application/Octet-Stream; Encoding="BGR"; Width=4; Height=3', (3, 4, "bgr")),
+    ("application/octet-stream", None),
+    ("application/octet-stream; width=4", None),
+    ("image/jpeg; width=4; height=3", None),
+])
+def test_raw_pixel_format(content_type, expected):
+    assert _raw_pixel_format(content_type) == expected
+
+
+@pytest.mark.parametrize("content_type", [
+    "application/octet-stream; encoding=yuv; width=4; height=3",
+    "application/octet-stream; width=0; height=3",
+])
+def test_raw_pixel_format_rejects_unsupported(content_type):
+    with pytest.raises(HTTPException) as exc:
+        _raw_pixel_format(content_type)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("encoding", ["bgr", "rgb"])
+def test_raw_image_size(encoding):
+    image = _raw_image(bytes(3 * 4 * 3), 3, 4, encoding)
+    assert image.shape == (3, 4, 3)
+    assert image.dtype == np.uint8
+
+
+def test_raw_image_swaps_rgb_to_bgr():
+    pixels = np.zeros((2, 2, 3), dtype=np.uint8)
+    pixels[..., 0] = 200  # red in RGB order
+    assert _raw_image(pixels.tobytes(), 2, 2, "bgr")[0, 0].tolist() == [200, 0, 0]
+    assert _raw_image(pixels.tobytes(), 2, 2, "rgb")[0, 0].tolist() == [0, 0, 200]
+
+
+def test_raw_image_wrong_byte_count():
+    with pytest.raises(HTTPException) as exc:
+        _raw_image(bytes(10), 2, 2, "bgr")
+    assert exc.value.status_code == 400
+
+
+def test_raw_upload_wrong_byte_count_returns_400(client):
+    resp = client.post(
+        "/solve", content=bytes(4 * 3 * 3 - 1),
+        headers={"content-type": "application/octet-stream; encoding=rgb; width=4; height=3"},
+    )
+    assert resp.status_code == 400
+
+
+def test_raw_upload_unknown_encoding_returns_400(client):
+    resp = client.post(
+        "/solve", content=bytes(4 * 3 * 3),
+        headers={"content-type": "application/octet-stream; encoding=yuv; width=4; height=3"},
+    )
+    assert resp.status_code == 400
+
+
+def _assert_renders_like_stdlib(client, monkeypatch, method, url, **kwargs):
+    """Request ``url`` and check the orjson body decodes to what stdlib JSONResponse would send."""
+    rendered = []
+    response_class = server.ORJSONResponse
+
+    def recording_response(content, **response_kwargs):
+        rendered.append(content)
+        return response_class(content, **response_kwargs)
+
+    monkeypatch.setattr(server, "ORJSONResponse", recording_response)
+    with warnings.catch_warnings():
+        # FastAPI's own ORJSONResponse is deprecated with a UserWarning subclass
+        warnings.simplefilter("error")
+        resp = client.request(method, url, **kwargs)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    (content,) = rendered
+    assert resp.json() == json.loads(JSONResponse(content).body)
+    return resp.json()
+
+
+def test_api_settings_json_matches_stdlib(client, monkeypatch):
+    body = _assert_renders_like_stdlib(client, monkeypatch, "GET", "/api/settings")
+    assert body["settings"]["MAX_RESULTS"] == settings.MAX_RESULTS
+
+
+def test_solve_json_matches_stdlib(client, monkeypatch):
+    board = [["C", "A"], ["T", "S"]]
+    trie = Trie()
+    for word in ("CAT", "CATS", "ACT"):
+        trie.insert(word)
+
+    def fake_pipeline(data, timer, cfg, raw_format=None, templates=None, reader=None):
+        with timer.stage("recognize"):
+            pass
+        return None, None, {}, 2, [], board, [[0.91, 0.5], [1.0, 0.875]]
+
+    async def no_notification(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server, "_trie", trie)
+    monkeypatch.setattr(server, "_run_cv_pipeline", fake_pipeline)
+    monkeypatch.setattr(server, "send_notification", no_notification)
+    monkeypatch.setattr(settings, "DEBUG", False)
+    body = _assert_renders_like_stdlib(
+        client, monkeypatch, "POST", "/solve", content=b"\xff\xd8", headers={"content-type": "image/jpeg"},
+    )
+    assert body["board"] == board
+    assert set(body["words"]) == {"CAT", "CATS", "ACT"}
+    assert body["cell_confidences"] == [[0.91, 0.5], [1.0, 0.875]]
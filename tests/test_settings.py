@@ -103,21 +103,19 @@ def test_common_words_default_true():
     assert cfg.COMMON_WORDS_ONLY is True
 
 
-def test_trie_reload_on_common_words_change():
+def test_trie_reload_on_common_words_change(trie_cache):
     """Changing COMMON_WORDS_ONLY should produce different trie sizes."""
-    from app.solver import load_trie
-
     cfg = _fresh_settings()
 
     # Load with common words (default)
     cfg.COMMON_WORDS_ONLY = True
     dict_path = cfg.DICTIONARY_COMMON_PATH if cfg.COMMON_WORDS_ONLY else cfg.DICTIONARY_PATH
-    trie_common = load_trie(str(dict_path), cfg.MIN_WORD_LENGTH)
+    trie_common = trie_cache(str(dict_path), cfg.MIN_WORD_LENGTH)
 
     # Load with full dictionary
     cfg.COMMON_WORDS_ONLY = False
     dict_path = cfg.DICTIONARY_COMMON_PATH if cfg.COMMON_WORDS_ONLY else cfg.DICTIONARY_PATH
-    trie_full = load_trie(str(dict_path), cfg.MIN_WORD_LENGTH)
+    trie_full = trie_cache(str(dict_path), cfg.MIN_WORD_LENGTH)
 
     # Full dictionary should find more words than common
     board = [
@@ -133,9 +131,9 @@ def test_trie_reload_on_common_words_change():
     assert len(words_full) > len(words_common)
 
 
-def test_trie_reload_on_min_word_length_change():
+def test_trie_reload_on_min_word_length_change(trie_cache):
     """Changing MIN_WORD_LENGTH should affect which words appear."""
-    from app.solver import load_trie, solve
+    from app.solver import solve
 
     cfg = _fresh_settings()
     board = [
@@ -145,10 +143,10 @@ def test_trie_reload_on_min_word_length_change():
         ["D", "I", "G", "S"],
     ]
 
-    trie_3 = load_trie(str(cfg.DICTIONARY_PATH), min_length=3)
+    trie_3 = trie_cache(str(cfg.DICTIONARY_PATH), 3)
     words_3, _ = solve(board, 4, trie_3, max_results=0)
 
-    trie_5 = load_trie(str(cfg.DICTIONARY_PATH), min_length=5)
+    trie_5 = trie_cache(str(cfg.DICTIONARY_PATH), 5)
     words_5, _ = solve(board, 4, trie_5, max_results=0)
 
     # With min_length=3, there should be short words
@@ -1,5 +1,12 @@
+import os
+import random
 import time
-from app.solver import Trie, load_trie, solve
+
+import numpy as np
+import pytest
+
+from app import solver
+from app.solver import Trie, _canonical_starts, _encode_cells, _solve_python, load_trie, solve, trie_cache_path
 
 
 def _make_trie(words: list[str]) -> Trie:
@@ -42,6 +49,91 @@ def test_qu_cell():
     assert "QUIT" in result
 
 
+def test_frozen_trie_save_load(tmp_path):
+    """A frozen trie round-trips through .npz and rejects further inserts."""
+    board = [
+        ["QU", "I", "T"],
+        ["E",  "S", "A"],
+        ["N",  "D", "R"],
+    ]
+    trie = _make_trie(["QUIT", "QUITE", "SAT", "STAR", "DEN"])
+    expected = solve(board, 3, trie)
+    with pytest.raises(RuntimeError):
+        trie.insert("TEN")
+
+    path = tmp_path / "trie.npz"
+    trie.save(str(path))
+    loaded = Trie.load(str(path))
+    assert solve(board, 3, loaded) == expected
+    found, _ = _solve_python([c for row in board for c in row], 3, loaded)
+    assert found == set(expected[0])
+
+
+def test_load_trie_uses_disk_cache(tmp_path):
+    """The frozen trie is cached next to the dictionary and rebuilt when the dictionary is newer."""
+    dict_file = tmp_path / "dict.txt"
+    dict_file.write_text("CAT\nCATS\nDOG\n")
+    board = [["C", "A"], ["S", "T"]]
+
+    trie = load_trie(str(dict_file), min_length=3)
+    cache = trie_cache_path(str(dict_file), 3)
+    assert cache.exists()
+    assert solve(board, 2, load_trie(str(dict_file), min_length=3))[0] == solve(board, 2, trie)[0]
+
+    dict_file.write_text("CAT\nCATS\nDOG\nACTS\n")
+    mtime = cache.stat().st_mtime + 10
+    os.utime(dict_file, (mtime, mtime))
+    assert "ACTS" in solve(board, 2, load_trie(str(dict_file), min_length=3))[0]
+
+
+def test_load_trie_reads_one_word_per_line(tmp_path):
+    """Lines are stripped, and a line with an inner space is dropped rather than split."""
+    dict_file = tmp_path / "dict.txt"
+    dict_file.write_text("  cat \r\nICE CREAM\nTEA\tPOT\nACT\n")
+    trie = load_trie(str(dict_file), min_length=3, use_cache=False)
+    board = [["C", "A", "T"], ["I", "C", "E"], ["R", "E", "A"]]
+    result, _ = solve(board, 3, trie)
+    assert sorted(result) == ["ACT", "CAT"]
+
+
+def _corrupt_empty(cache, valid: bytes):
+    cache.write_bytes(b"")
+
+
+def _corrupt_truncated(cache, valid: bytes):
+    cache.write_bytes(valid[: len(valid) // 2])
+
+
+def _corrupt_old_version(cache, valid: bytes):
+    with np.load(cache) as data:
+        arrays = {k: data[k] for k in data.files if k != "version"}
+    np.savez(cache, **arrays)
+
+
+def _corrupt_wrong_dtype(cache, valid: bytes):
+    with np.load(cache) as data:
+        arrays = {k: data[k] for k in data.files}
+    arrays["children"] = arrays["children"].astype(np.int64)
+    np.savez(cache, **arrays)
+
+
+@pytest.mark.parametrize("corrupt", [_corrupt_empty, _corrupt_truncated, _corrupt_old_version, _corrupt_wrong_dtype])
+def test_load_trie_rebuilds_bad_cache(tmp_path, corrupt):
+    """An unreadable or mismatched cache falls back to the dictionary and is rewritten."""
+    dict_file = tmp_path / "dict.txt"
+    dict_file.write_text("CAT\nCATS\nDOG\n")
+    board = [["C", "A"], ["S", "T"]]
+    expected = solve(board, 2, load_trie(str(dict_file), min_length=3))
+
+    cache = trie_cache_path(str(dict_file), 3)
+    corrupt(cache, cache.read_bytes())
+    mtime = dict_file.stat().st_mtime + 10
+    os.utime(cache, (mtime, mtime))
+
+    assert solve(board, 2, load_trie(str(dict_file), min_length=3)) == expected
+    assert solve(board, 2, Trie.load(str(cache))) == expected
+
+
 def test_no_revisit():
     """A word requiring revisiting a cell should not be found."""
     board = [
@@ -98,18 +190,11 @@ def test_performance_with_full_dictionary(tmp_path):
     """Solve a 4x4 board with a decent-size dictionary under 500ms."""
     # Create a small but non-trivial dictionary
     dict_file = tmp_path / "dict.txt"
-    words = []
-    # Generate many 3-6 letter words from common letters
+    # Generate 5001 3-4 letter words from common letters, straight into one bytes buffer
     import itertools
-    letters = "ABCDEFGHIJKLMNOPRSTUE"
-    for length in range(3, 5):
-        for combo in itertools.combinations(letters, length):
-            words.append("".join(combo))
-            if len(words) > 5000:
-                break
-        if len(words) > 5000:
-            break
-    dict_file.write_text("\n".join(words))
+    letters = b"ABCDEFGHIJKLMNOPRSTUE"
+    combos = itertools.chain.from_iterable(itertools.combinations(letters, n) for n in range(3, 5))
+    dict_file.write_bytes(b"\n".join(map(bytes, itertools.islice(combos, 5001))))
     trie = load_trie(str(dict_file), min_length=3)
 
     board = [
@@ -125,3 +210,107 @@ def test_performance_with_full_dictionary(tmp_path):
 
     assert elapsed < 0.5, f"Solver took {elapsed:.3f}s (expected <0.5s)"
     assert len(result) > 0
+
+
+def _brute_force_starts(board: list[list[str]], words: set[str]) -> dict[str, tuple[int, int]]:
+    """Reference search from every cell (no symmetry dedup): word -> topmost-leftmost start."""
+    n = len(board)
+    prefixes = {w[:i] for w in words for i in range(1, len(w) + 1)}
+    starts: dict[str, tuple[int, int]] = {}
+
+    def walk(r, c, text, visited, start):
+        text += board[r][c]
+        if text not in prefixes:
+            return
+        if text in words:
+            starts.setdefault(text, start)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < n and 0 <= nc < n and (nr, nc) not in visited:
+                    walk(nr, nc, text, visited | {(nr, nc)}, start)
+
+    for r in range(n):
+        for c in range(n):
+            walk(r, c, "", {(r, c)}, (r, c))
+    return starts
+
+
+def _symmetric_board(rng: random.Random, n: int, cells: list[str]) -> list[list[str]]:
+    """Random board invariant under one random rotation or reflection of the grid."""
+    perm = solver._symmetry_perms(n)[rng.randrange(1, 8)]
+    flat = [None] * (n * n)
+    for i in range(n * n):
+        if flat[i] is None:
+            letter = rng.choice(cells)
+            j = i
+            while flat[j] is None:  # fill the whole orbit of i
+                flat[j] = letter
+                j = int(perm[j])
+    return [flat[r * n:(r + 1) * n] for r in range(n)]
+
+
+def _path_words(rng: random.Random, board: list[list[str]], count: int) -> list[str]:
+    """Words spelled along random self-avoiding walks, so every board has hits."""
+    n = len(board)
+    words = []
+    for _ in range(count):
+        r, c = rng.randrange(n), rng.randrange(n)
+        path, text = {(r, c)}, board[r][c]
+        for _ in range(rng.randint(2, 5)):
+            steps = [(r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                     if 0 <= r + dr < n and 0 <= c + dc < n and (r + dr, c + dc) not in path]
+            if not steps:
+                break
+            r, c = rng.choice(steps)
+            path.add((r, c))
+            text += board[r][c]
+        if "?" not in text and len(text) >= 3:
+            words.append(text)
+    return words
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_compiled_matches_python_dfs(symmetric):
+    """Both DFS paths agree with a search from every cell, on random and symmetric boards.
+
+    The reference skips no starts, so a wrong symmetry permutation in
+    _canonical_starts would show up as missing words or moved starts.
+    """
+    rng = random.Random(0)
+    cells = list("EIPSTU") + ["QU", "?"]
+    base_words = ["QUIT", "QUITE", "SUIT", "TIES", "SITE", "EQUIP", "PIES", "SPITE", "TIP", "PIT", "SIP"]
+    for n in (3, 4, 5):
+        for _ in range(20):
+            if symmetric:
+                board = _symmetric_board(rng, n, cells)
+            else:
+                board = [[rng.choice(cells) for _ in range(n)] for _ in range(n)]
+            words = set(base_words + _path_words(rng, board, 15))
+            trie = _make_trie(sorted(words))
+            chars = [c for row in board for c in row]
+
+            expected_starts = _brute_force_starts(board, words)
+            expected = (set(expected_starts), expected_starts)
+            assert _solve_python(chars, n, trie) == expected
+            if solver.njit is not None:
+                assert solver._solve_compiled(chars, n, trie.table) == expected
+            assert solve(board, n, trie, max_results=0)[1] == expected_starts
+
+
+def test_symmetric_board_skips_mirrored_starts():
+    """Starts related by a letter-preserving rotation/reflection are searched once, with identical results."""
+    board = [
+        ["S", "E", "S"],
+        ["E", "T", "E"],
+        ["S", "E", "S"],
+    ]
+    codes = _encode_cells([c for row in board for c in row])
+    assert _canonical_starts(codes, 3).tolist() == [0, 1, 4]
+
+    trie = _make_trie(["SET", "SETS", "TEE", "TEES", "ESE", "SEE", "TEST"])
+    result, starts = solve(board, 3, trie, max_results=0)
+    assert set(result) == {"SET", "SETS", "TEE", "TEES", "ESE", "SEE"}
+    assert starts["TEE"] == (1, 1)
+    assert starts["SEE"] == (0, 0)
+    assert starts["ESE"] == (0, 1)